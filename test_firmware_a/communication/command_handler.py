@@ -1,7 +1,8 @@
 """Transport-agnostic command handler for ESP32-A (Sensor Board).
 
 Imported by: communication.udp_commands, communication.nodered_client
-Imports: debug.debug, core.state, core.timers
+Imports: debug.debug, core.state, core.timers, communication.wifi, config.config,
+         ujson, machine, time, os
 
 Interprets and executes commands from any source (UDP, MQTT, Node-RED, HTTP).
 Commands are transport-agnostic - this module only handles command logic.
@@ -21,9 +22,79 @@ Supported commands:
 All commands return: {\"success\": bool, \"message\": str, ...extra_data}
 """
 
+import os
+import time  # type: ignore
+import machine  # type: ignore
+try:
+    import ujson as json  # type: ignore  # MicroPython
+except ImportError:
+    import json  # Fallback
 from debug.debug import log, set_log_enabled, set_all_logs, get_log_flags
 from core import state
 from core import timers
+from core.timers import _user_actions  # Live lock dict (never rebound by timers)
+from communication import wifi
+from config.config import FIRMWARE_VERSION
+
+
+_MAX_ARGS = 8  # Upper bound on args accepted per command
+
+# Accepted argument values, built once (no per-call list literals)
+_MODE_VALUES = frozenset(("real", "sim", "simulation"))
+_SIM_MODES = frozenset(("sim", "simulation"))
+_LOG_ON_VALUES = frozenset(("on", "true", "1"))
+_LOG_OFF_VALUES = frozenset(("off", "false", "0"))
+_LOG_ALL_TARGETS = frozenset(("all", "*"))
+_HEART_SENSOR_NAMES = frozenset(("heart", "hr"))
+
+# Fixed error responses, shared rather than rebuilt per bad call.
+# Callers only read responses; never mutate these.
+_ERR_LOG_USAGE = {"success": False, "message": "Usage: log <channel|all|status> <on|off>"}
+_ERR_LOG_SET_USAGE = {"success": False, "message": "Usage: log <channel|all> <on|off>"}
+_ERR_LOG_VALUE = {"success": False, "message": "Second arg must be on/off"}
+_ERR_THRESHOLD_USAGE = {"success": False, "message": "Usage: threshold <sensor> <value>"}
+_ERR_SIMULATE_USAGE = {"success": False, "message": "Usage: simulate <sensor> <value>"}
+_ERR_TEST_ALARM_USAGE = {"success": False, "message": "Usage: test_alarm <warning|danger|reset>"}
+_ERR_TEST_ALARM_ACTION = {"success": False, "message": "Invalid test_alarm action. Use: warning, danger, reset"}
+_ERR_TEST_SENSOR_USAGE = {"success": False, "message": "Usage: test_sensor <sensor> <action> [value]"}
+_ERR_TEST_CO_ACTION = {"success": False, "message": "CO actions: set <ppm>, min, max, normal"}
+_ERR_TEST_TEMP_ACTION = {"success": False, "message": "Temperature actions: set <°C>, min, max, normal"}
+_ERR_TEST_HEART_ACTION = {"success": False, "message": "Heart rate actions: set <bpm>, low, high, normal"}
+_ERR_ALARM_USAGE = {"success": False, "message": "Usage: alarm <trigger|clear|test>"}
+_ERR_MODE_USAGE = {"success": False, "message": "Usage: mode <real|sim>"}
+_ERR_MODE_INVALID = {"success": False, "message": "Invalid mode. Use: real, sim"}
+
+# Fixed success reply for reboot (flag set, main loop does the reset)
+_RESP_REBOOT = {"success": True, "message": "System will reboot shortly."}
+
+# config.json lives under config/ on a deployed board; root copy is a fallback
+_CONFIG_PATHS = ("config/config.json", "config.json")
+
+
+def _config_path():
+    """Return the first existing config.json path (probed with os.stat)."""
+    for path in _CONFIG_PATHS:
+        try:
+            os.stat(path)
+            return path
+        except OSError:
+            pass
+    return _CONFIG_PATHS[0]
+
+
+def _load_config():
+    """Load config.json as a dict ({} if missing or unreadable)."""
+    try:
+        with open(_config_path(), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_config(config_data):
+    """Write config dict back to the config.json path in use."""
+    with open(_config_path(), "w") as f:
+        json.dump(config_data, f)
 
 
 def handle_command(command, args):
@@ -37,62 +108,21 @@ def handle_command(command, args):
         dict: Response with 'success' (bool) and 'message' (string)
     """
     try:
-        command = command.lower()
-        
-        # Threshold control: threshold <sensor> <value>
-        if command == "threshold":
-            return _handle_threshold(args)
-        
-        # Simulation control: simulate <sensor> <value>
-        elif command == "simulate":
-            return _handle_simulate(args)
-        
-        # Test alarm scenarios: test_alarm <warning|danger|reset>
-        elif command == "test_alarm":
-            return _handle_test_alarm(args)
-        
-        # Test specific sensor: test_sensor <sensor> <action> [value]
-        elif command == "test_sensor":
-            return _handle_test_sensor(args)
-        
-        # Alarm control: alarm <action>
-        elif command == "alarm":
-            return _handle_alarm(args)
-        
-        # Get current state: state
-        elif command == "state":
-            return _handle_state(args)
-        
-        # Get system status: status
-        elif command == "status":
-            return _handle_status(args)
-        
-        # Show active user locks: locks
-        elif command == "locks":
-            return _handle_locks(args)
-        
-        # Trigger OTA update: update
-        elif command == "update":
-            return _handle_update(args)
-        
-        # Trigger system reboot: reboot
-        elif command == "reboot":
-            return _handle_reboot(args)
-        
-        # Change simulation mode: mode <real|sim>
-        elif command == "mode":
-            return _handle_mode(args)
-
-        # Logging control: log <channel|all|status> <on|off>
-        elif command == "log":
-            return _handle_log(args)
+        # No command takes more than a handful of args; drop any excess a peer
+        # sends so handlers never walk an oversized list
+        if len(args) > _MAX_ARGS:
+            args = args[:_MAX_ARGS]
         
-        else:
-            return {"success": False, "message": "Unknown command: {}".format(command)}
+        # Single hashed lookup instead of an if/elif ladder over every command.
+        # Commands normally arrive lowercase; lower() only runs on a miss.
+        handler = COMMAND_TABLE.get(command) or COMMAND_TABLE.get(command.lower())
+        if handler is None:
+            return {"success": False, "message": "Unknown command: " + command}
+        return handler(args)
     
     except Exception as e:
-        log("cmd_handler", "Error handling command '{}': {}".format(command, e))
-        return {"success": False, "message": "Error: {}".format(e)}
+        log("cmd_handler", "Error handling command '{}': {}", command, e)
+        return {"success": False, "message": "Error: " + str(e)}
 
 
 def _handle_log(args):
@@ -104,7 +134,7 @@ def _handle_log(args):
       log status
     """
     if not args:
-        return {"success": False, "message": "Usage: log <channel|all|status> <on|off>"}
+        return _ERR_LOG_USAGE
 
     target = args[0].lower()
 
@@ -113,24 +143,26 @@ def _handle_log(args):
         return {"success": True, "message": "Log flags status", "log_flags": get_log_flags()}
 
     if len(args) < 2:
-        return {"success": False, "message": "Usage: log <channel|all> <on|off>"}
+        return _ERR_LOG_SET_USAGE
 
-    state = args[1].lower()
-    if state in ("on", "true", "1"):
+    state = args[1]
+    if state not in _LOG_ON_VALUES and state not in _LOG_OFF_VALUES:
+        state = state.lower()
+    if state in _LOG_ON_VALUES:
         enabled = True
-    elif state in ("off", "false", "0"):
+    elif state in _LOG_OFF_VALUES:
         enabled = False
     else:
-        return {"success": False, "message": "Second arg must be on/off"}
+        return _ERR_LOG_VALUE
 
-    if target in ("all", "*"):
+    if target in _LOG_ALL_TARGETS:
         set_all_logs(enabled)
-        return {"success": True, "message": "All logs set to {}".format(enabled), "log_flags": get_log_flags()}
+        return {"success": True, "message": "All logs set to " + str(enabled), "log_flags": get_log_flags()}
 
     set_log_enabled(target, enabled)
     return {
         "success": True,
-        "message": "Log '{}' set to {}".format(target, enabled),
+        "message": "Log '" + target + "' set to " + str(enabled),
         "log_flags": get_log_flags(),
     }
 
@@ -138,26 +170,38 @@ def _handle_log(args):
 def _handle_threshold(args):
     """Handle threshold command: threshold <sensor> <value>"""
     if len(args) < 2:
-        return {"success": False, "message": "Usage: threshold <sensor> <value>"}
+        return _ERR_THRESHOLD_USAGE
     
     # Args are already validated and normalized by send_command.py
     sensor = args[0]
     value = args[1]
     
-    log("cmd_handler", "Threshold {} set to {}".format(sensor, value))
-    return {"success": True, "message": "Threshold {} set to {} (placeholder)".format(sensor, value)}
+    msg = "Threshold " + sensor + " set to " + str(value)
+    log("cmd_handler", msg)
+    return {"success": True, "message": msg + " (placeholder)"}
+
+
+def _heart_rate_data():
+    """Return state.sensor_data["heart_rate"], creating it if it was cleared to None."""
+    sensor_data = state.sensor_data
+    heart_rate = sensor_data["heart_rate"]
+    if heart_rate is None:
+        heart_rate = sensor_data["heart_rate"] = {}
+    return heart_rate
 
 
 def _handle_simulate(args):
     """Handle simulate command: simulate <sensor> <value>"""
     if len(args) < 2:
-        return {"success": False, "message": "Usage: simulate <sensor> <value>"}
+        return _ERR_SIMULATE_USAGE
     
     # Args are already validated and normalized by send_command.py
     sensor = args[0]
     value_str = args[1]
     
-    auto_value = value_str.lower() == "auto"
+    # send_command.py sends it lowercase already: only fold case on a miss
+    auto_value = value_str == "auto" or value_str.lower() == "auto"
+    sensor_data = state.sensor_data
 
     # Parse value
     try:
@@ -167,10 +211,11 @@ def _handle_simulate(args):
                 log("cmd_handler", "Temperature back to auto")
                 return {"success": True, "message": "Temperature set to auto"}
             value = float(value_str)
-            state.sensor_data["temperature"] = value
+            sensor_data["temperature"] = value
             timers.set_user_lock("temp_read")
-            log("cmd_handler", "Temperature simulated: {}°C".format(value))
-            return {"success": True, "message": "Temperature set to {}°C".format(value)}
+            msg = "Temperature set to " + str(value) + "°C"
+            log("cmd_handler", msg)
+            return {"success": True, "message": msg}
         
         elif sensor == "co":
             if auto_value:
@@ -178,10 +223,11 @@ def _handle_simulate(args):
                 log("cmd_handler", "CO back to auto")
                 return {"success": True, "message": "CO set to auto"}
             value = int(value_str)
-            state.sensor_data["co"] = value
+            sensor_data["co"] = value
             timers.set_user_lock("co_read")
-            log("cmd_handler", "CO simulated: {} ppm".format(value))
-            return {"success": True, "message": "CO set to {} ppm".format(value)}
+            msg = "CO set to " + str(value) + " ppm"
+            log("cmd_handler", msg)
+            return {"success": True, "message": msg}
         
         elif sensor == "ultrasonic":
             if auto_value:
@@ -189,10 +235,11 @@ def _handle_simulate(args):
                 log("cmd_handler", "Ultrasonic back to auto")
                 return {"success": True, "message": "Ultrasonic set to auto"}
             value = float(value_str)
-            state.sensor_data["ultrasonic_distance_cm"] = value
+            sensor_data["ultrasonic_distance_cm"] = value
             timers.set_user_lock("ultrasonic_read")
-            log("cmd_handler", "Ultrasonic simulated: {} cm".format(value))
-            return {"success": True, "message": "Distance set to {} cm".format(value)}
+            msg = "Distance set to " + str(value) + " cm"
+            log("cmd_handler", msg)
+            return {"success": True, "message": msg}
         
         elif sensor == "heart":
             if auto_value:
@@ -200,12 +247,11 @@ def _handle_simulate(args):
                 log("cmd_handler", "Heart rate back to auto")
                 return {"success": True, "message": "Heart rate set to auto"}
             value = int(value_str)
-            if state.sensor_data["heart_rate"] is None:
-                state.sensor_data["heart_rate"] = {}
-            state.sensor_data["heart_rate"]["bpm"] = value
+            _heart_rate_data()["bpm"] = value
             timers.set_user_lock("heart_rate_read")
-            log("cmd_handler", "Heart rate simulated: {} bpm".format(value))
-            return {"success": True, "message": "Heart rate set to {} bpm".format(value)}
+            msg = "Heart rate set to " + str(value) + " bpm"
+            log("cmd_handler", msg)
+            return {"success": True, "message": msg}
         
         elif sensor == "spo2":
             if auto_value:
@@ -213,18 +259,17 @@ def _handle_simulate(args):
                 log("cmd_handler", "SpO2 back to auto")
                 return {"success": True, "message": "SpO2 set to auto"}
             value = int(value_str)
-            if state.sensor_data["heart_rate"] is None:
-                state.sensor_data["heart_rate"] = {}
-            state.sensor_data["heart_rate"]["spo2"] = value
+            _heart_rate_data()["spo2"] = value
             timers.set_user_lock("heart_rate_read")
-            log("cmd_handler", "SpO2 simulated: {}%".format(value))
-            return {"success": True, "message": "SpO2 set to {}%".format(value)}
+            msg = "SpO2 set to " + str(value) + "%"
+            log("cmd_handler", msg)
+            return {"success": True, "message": msg}
         
         else:
-            return {"success": False, "message": "Unknown sensor: {}".format(sensor)}
+            return {"success": False, "message": "Unknown sensor: " + sensor}
     
     except ValueError:
-        return {"success": False, "message": "Invalid value for sensor {}".format(sensor)}
+        return {"success": False, "message": "Invalid value for sensor " + sensor}
 
 
 def _handle_test_alarm(args):
@@ -233,13 +278,15 @@ def _handle_test_alarm(args):
     Simulates alarm scenarios by setting sensor values to trigger specific alarm levels.
     """
     if len(args) < 1:
-        return {"success": False, "message": "Usage: test_alarm <warning|danger|reset>"}
+        return _ERR_TEST_ALARM_USAGE
     
     action = args[0].lower()
     
+    sensor_data = state.sensor_data
+    
     if action == "warning":
         # Trigger warning: CO just above warning threshold but below danger
-        state.sensor_data["co"] = 60  # Above critical (50 PPM) by 10
+        sensor_data["co"] = 60  # Above critical (50 PPM) by 10
         timers.set_user_lock("co_read")
         log("cmd_handler", "TEST: CO set to 60 ppm -> should trigger WARNING in ~5 seconds")
         return {
@@ -249,7 +296,7 @@ def _handle_test_alarm(args):
     
     elif action == "danger":
         # Trigger danger: CO well above threshold
-        state.sensor_data["co"] = 120  # Well above critical
+        sensor_data["co"] = 120  # Well above critical
         timers.set_user_lock("co_read")
         log("cmd_handler", "TEST: CO set to 120 ppm -> should trigger DANGER in ~30 seconds")
         return {
@@ -259,10 +306,11 @@ def _handle_test_alarm(args):
     
     elif action == "reset":
         # Reset to safe value
-        state.sensor_data["co"] = 10
-        state.sensor_data["temperature"] = 23.5
-        state.sensor_data["heart_rate"]["bpm"] = 75
-        state.sensor_data["heart_rate"]["spo2"] = 98
+        sensor_data["co"] = 10
+        sensor_data["temperature"] = 23.5
+        heart_rate = _heart_rate_data()
+        heart_rate["bpm"] = 75
+        heart_rate["spo2"] = 98
         timers.set_user_lock("co_read")
         timers.set_user_lock("temp_read")
         timers.set_user_lock("heart_rate_read")
@@ -273,7 +321,7 @@ def _handle_test_alarm(args):
         }
     
     else:
-        return {"success": False, "message": "Invalid test_alarm action. Use: warning, danger, reset"}
+        return _ERR_TEST_ALARM_ACTION
 
 
 def _handle_test_sensor(args):
@@ -283,110 +331,105 @@ def _handle_test_sensor(args):
     Actions: set <value>, min, max, normal
     """
     if len(args) < 2:
-        return {"success": False, "message": "Usage: test_sensor <sensor> <action> [value]"}
+        return _ERR_TEST_SENSOR_USAGE
     
     sensor = args[0].lower()
     action = args[1].lower()
     
+    sensor_data = state.sensor_data
+    
     try:
         if sensor == "co":
             if action == "set" and len(args) >= 3:
                 value = int(args[2])
-                state.sensor_data["co"] = value
+                sensor_data["co"] = value
                 timers.set_user_lock("co_read")
-                log("cmd_handler", "TEST: CO sensor set to {} ppm".format(value))
-                return {"success": True, "message": "CO set to {} ppm".format(value)}
+                msg = "CO set to " + str(value) + " ppm"
+                log("cmd_handler", msg)
+                return {"success": True, "message": msg}
             elif action == "min":
-                state.sensor_data["co"] = 0
+                sensor_data["co"] = 0
                 timers.set_user_lock("co_read")
                 return {"success": True, "message": "CO set to minimum (0 ppm)"}
             elif action == "max":
-                state.sensor_data["co"] = 200
+                sensor_data["co"] = 200
                 timers.set_user_lock("co_read")
                 return {"success": True, "message": "CO set to maximum (200 ppm)"}
             elif action == "normal":
-                state.sensor_data["co"] = 10
+                sensor_data["co"] = 10
                 timers.set_user_lock("co_read")
                 return {"success": True, "message": "CO set to normal (10 ppm)"}
             else:
-                return {"success": False, "message": "CO actions: set <ppm>, min, max, normal"}
+                return _ERR_TEST_CO_ACTION
         
         elif sensor == "temperature":
             if action == "set" and len(args) >= 3:
                 value = float(args[2])
-                state.sensor_data["temperature"] = value
+                sensor_data["temperature"] = value
                 timers.set_user_lock("temp_read")
-                log("cmd_handler", "TEST: Temperature set to {}°C".format(value))
-                return {"success": True, "message": "Temperature set to {}°C".format(value)}
+                msg = "Temperature set to " + str(value) + "°C"
+                log("cmd_handler", msg)
+                return {"success": True, "message": msg}
             elif action == "min":
-                state.sensor_data["temperature"] = 5  # Below safe min (10°C)
+                sensor_data["temperature"] = 5  # Below safe min (10°C)
                 timers.set_user_lock("temp_read")
                 return {"success": True, "message": "Temperature set to minimum (5°C - UNSAFE)"}
             elif action == "max":
-                state.sensor_data["temperature"] = 40  # Above safe max (35°C)
+                sensor_data["temperature"] = 40  # Above safe max (35°C)
                 timers.set_user_lock("temp_read")
                 return {"success": True, "message": "Temperature set to maximum (40°C - UNSAFE)"}
             elif action == "normal":
-                state.sensor_data["temperature"] = 23.5
+                sensor_data["temperature"] = 23.5
                 timers.mark_user_action("temp_read")
                 return {"success": True, "message": "Temperature set to normal (23.5°C)"}
             else:
-                return {"success": False, "message": "Temperature actions: set <°C>, min, max, normal"}
+                return _ERR_TEST_TEMP_ACTION
         
-        elif sensor == "heart" or sensor == "hr":
+        elif sensor in _HEART_SENSOR_NAMES:
             if action == "set" and len(args) >= 3:
                 value = int(args[2])
-                if state.sensor_data["heart_rate"] is None:
-                    state.sensor_data["heart_rate"] = {}
-                state.sensor_data["heart_rate"]["bpm"] = value
+                _heart_rate_data()["bpm"] = value
                 timers.mark_user_action("heart_rate_read")
-                log("cmd_handler", "TEST: Heart rate set to {} bpm".format(value))
-                return {"success": True, "message": "Heart rate set to {} bpm".format(value)}
+                msg = "Heart rate set to " + str(value) + " bpm"
+                log("cmd_handler", msg)
+                return {"success": True, "message": msg}
             elif action == "low":
-                if state.sensor_data["heart_rate"] is None:
-                    state.sensor_data["heart_rate"] = {}
-                state.sensor_data["heart_rate"]["bpm"] = 40  # Below safe min (50 bpm)
+                _heart_rate_data()["bpm"] = 40  # Below safe min (50 bpm)
                 timers.mark_user_action("heart_rate_read")
                 return {"success": True, "message": "Heart rate set to low (40 bpm - UNSAFE)"}
             elif action == "high":
-                if state.sensor_data["heart_rate"] is None:
-                    state.sensor_data["heart_rate"] = {}
-                state.sensor_data["heart_rate"]["bpm"] = 140  # Above safe max (120 bpm)
+                _heart_rate_data()["bpm"] = 140  # Above safe max (120 bpm)
                 timers.mark_user_action("heart_rate_read")
                 return {"success": True, "message": "Heart rate set to high (140 bpm - UNSAFE)"}
             elif action == "normal":
-                if state.sensor_data["heart_rate"] is None:
-                    state.sensor_data["heart_rate"] = {}
-                state.sensor_data["heart_rate"]["bpm"] = 75
+                _heart_rate_data()["bpm"] = 75
                 timers.mark_user_action("heart_rate_read")
                 return {"success": True, "message": "Heart rate set to normal (75 bpm)"}
             else:
-                return {"success": False, "message": "Heart rate actions: set <bpm>, low, high, normal"}
+                return _ERR_TEST_HEART_ACTION
         
         else:
-            return {"success": False, "message": "Unknown sensor: {}. Available: co, temperature, heart".format(sensor)}
+            return {"success": False, "message": "Unknown sensor: " + sensor + ". Available: co, temperature, heart"}
     
     except (ValueError, TypeError):
-        return {"success": False, "message": "Invalid value format for {}".format(sensor)}
+        return {"success": False, "message": "Invalid value format for " + sensor}
 
 
 def _handle_alarm(args):
     """Handle alarm command: alarm <action>"""
     if len(args) < 1:
-        return {"success": False, "message": "Usage: alarm <trigger|clear|test>"}
+        return _ERR_ALARM_USAGE
     
     # Args are already validated and normalized by send_command.py
     action = args[0]
     
     if action == "trigger":
-        state.alarm_state["level"] = "danger"
-        state.alarm_state["source"] = "manual"
+        state.set_alarm("danger", "manual")
         log("cmd_handler", "Alarm triggered manually")
         return {"success": True, "message": "Alarm triggered"}
     
     elif action == "clear":
-        state.alarm_state["level"] = "normal"
-        state.alarm_state["source"] = None
+        state.set_alarm("normal", None)
         log("cmd_handler", "Alarm cleared")
         return {"success": True, "message": "Alarm cleared"}
     
@@ -395,20 +438,22 @@ def _handle_alarm(args):
         return {
             "success": True,
             "message": "Alarm test",
-            "alarm": state.alarm_state
+            "alarm": dict(state.alarm_state)
         }
 
 
 def _handle_state(args):
     """Handle state command: Get current sensor state"""
+    # Copies, not the live dicts: the reply is JSON-encoded after we return
+    # and the sensor loop must not change it half-way through
     response = {
         "success": True,
         "message": "Current sensor state",
         "state": {
-            "sensors": state.sensor_data,
-            "buttons": state.button_state,
-            "alarm": state.alarm_state,
-            "system": state.system_state
+            "sensors": dict(state.sensor_data),
+            "buttons": dict(state.button_state),
+            "alarm": dict(state.alarm_state),
+            "system": dict(state.system_state)
         }
     }
     log("cmd_handler", "State query")
@@ -417,18 +462,19 @@ def _handle_state(args):
 
 def _handle_status(args):
     """Handle status command: Get system status"""
-    from communication import wifi
-    from config.config import FIRMWARE_VERSION
+    sensor_data = state.sensor_data
+    alarm_state = state.alarm_state
+    heart_rate = sensor_data.get("heart_rate")
     
     status_info = {
         "firmware_version": FIRMWARE_VERSION,
         "wifi": "connected" if wifi.is_connected() else "disconnected",
         "simulation_mode": state.simulation_mode,
-        "alarm_level": state.alarm_state["level"],
-        "alarm_source": state.alarm_state["source"],
-        "temperature": state.sensor_data.get("temperature"),
-        "co": state.sensor_data.get("co"),
-        "heart_bpm": state.sensor_data.get("heart_rate", {}).get("bpm") if state.sensor_data.get("heart_rate") else None,
+        "alarm_level": alarm_state["level"],
+        "alarm_source": alarm_state["source"],
+        "temperature": sensor_data.get("temperature"),
+        "co": sensor_data.get("co"),
+        "heart_bpm": heart_rate.get("bpm") if heart_rate else None,
     }
     
     response = {
@@ -443,56 +489,35 @@ def _handle_status(args):
 
 def _handle_locks(args):
     """Handle locks command: Show active user locks"""
-    from core.timers import _user_actions
-    
     if not _user_actions:
         return {"success": True, "message": "No active locks"}
     
     locks_list = ", ".join(_user_actions.keys())
     response = {
         "success": True,
-        "message": "Active user locks: {}".format(locks_list),
+        "message": "Active user locks: " + locks_list,
         "locks": list(_user_actions.keys())
     }
     
-    log("cmd_handler", "Locks query: {}".format(locks_list))
+    log("cmd_handler", "Locks query: " + locks_list)
     return response
 
 
 def _handle_update(args):
     """Handle update command: Set OTA flag and reboot"""
-    import json
-    import machine  # type: ignore
-    
     log("cmd_handler", "OTA update requested via command")
     
     try:
-        # Try to load existing config
-        try:
-            with open("config/config.json", "r") as f:
-                config_data = json.load(f)
-        except:
-            try:
-                with open("config.json", "r") as f:
-                    config_data = json.load(f)
-            except:
-                config_data = {}
+        config_data = _load_config()
         
         # Set OTA update flag
         config_data["ota_update_pending"] = True
         
-        # Write back to config.json
-        try:
-            with open("config/config.json", "w") as f:
-                json.dump(config_data, f)
-        except:
-            with open("config.json", "w") as f:
-                json.dump(config_data, f)
+        _save_config(config_data)
         
         log("cmd_handler", "OTA update flag set - rebooting")
         
         # Reboot to trigger OTA update on startup
-        import time  # type: ignore
         time.sleep(1)
         machine.reset()
         
@@ -501,10 +526,10 @@ def _handle_update(args):
             "message": "OTA update will start after reboot."
         }
     except Exception as e:
-        log("cmd_handler", "Error setting OTA flag: {}".format(e))
+        log("cmd_handler", "Error setting OTA flag: {}", e)
         return {
             "success": False,
-            "message": "Error setting OTA flag: {}".format(e)
+            "message": "Error setting OTA flag: " + str(e)
         }
 
 
@@ -512,58 +537,58 @@ def _handle_reboot(args):
     """Handle reboot command: Trigger system reboot"""
     state.system_control["reboot_requested"] = True
     log("cmd_handler", "System reboot requested via command")
-    return {
-        "success": True,
-        "message": "System will reboot shortly."
-    }
+    return _RESP_REBOOT
 
 
 def _handle_mode(args):
     """Handle mode command: mode <real|sim>"""
-    import json
-    
     if len(args) < 1:
-        return {"success": False, "message": "Usage: mode <real|sim>"}
-    
-    mode = args[0].lower()
+        return _ERR_MODE_USAGE
     
-    if mode not in ["real", "sim", "simulation"]:
-        return {"success": False, "message": "Invalid mode. Use: real, sim"}
+    mode = args[0]
+    if mode not in _MODE_VALUES:
+        mode = mode.lower()
+        if mode not in _MODE_VALUES:
+            return _ERR_MODE_INVALID
     
-    simulate = (mode in ["sim", "simulation"])
+    simulate = (mode in _SIM_MODES)
     
     # Save mode to config.json
     try:
-        # Try to load existing config
-        try:
-            with open("config/config.json", "r") as f:
-                config_data = json.load(f)
-        except:
-            try:
-                with open("config.json", "r") as f:
-                    config_data = json.load(f)
-            except:
-                config_data = {}
+        config_data = _load_config()
         
         # Update simulate_sensors field
         config_data["simulate_sensors"] = simulate
         
-        # Write back to config.json
-        try:
-            with open("config/config.json", "w") as f:
-                json.dump(config_data, f)
-        except:
-            with open("config.json", "w") as f:
-                json.dump(config_data, f)
+        _save_config(config_data)
         
-        log("cmd_handler", "Mode changed to: {}".format("simulation" if simulate else "real"))
+        mode_name = "simulation" if simulate else "real"
+        log("cmd_handler", "Mode changed to: " + mode_name)
         
         # Request reboot
         state.system_control["reboot_requested"] = True
         
         return {
             "success": True,
-            "message": "Mode set to {}. System will reboot.".format("simulation" if simulate else "real")
+            "message": "Mode set to " + mode_name + ". System will reboot."
         }
     except Exception as e:
-        return {"success": False, "message": "Error saving mode: {}".format(e)}
+        return {"success": False, "message": "Error saving mode: " + str(e)}
+
+
+# Command name -> handler. Built after all handlers are defined;
+# handle_command() looks commands up here (names are lowercase).
+COMMAND_TABLE = {
+    "threshold": _handle_threshold,      # Threshold control: threshold <sensor> <value>
+    "simulate": _handle_simulate,        # Simulation control: simulate <sensor> <value>
+    "test_alarm": _handle_test_alarm,    # Test alarm scenarios: test_alarm <warning|danger|reset>
+    "test_sensor": _handle_test_sensor,  # Test specific sensor: test_sensor <sensor> <action> [value]
+    "alarm": _handle_alarm,              # Alarm control: alarm <action>
+    "state": _handle_state,              # Get current state: state
+    "status": _handle_status,            # Get system status: status
+    "locks": _handle_locks,              # Show active user locks: locks
+    "update": _handle_update,            # Trigger OTA update: update
+    "reboot": _handle_reboot,            # Trigger system reboot: reboot
+    "mode": _handle_mode,                # Change simulation mode: mode <real|sim>
+    "log": _handle_log,                  # Logging control: log <channel|all|status> <on|off>
+}
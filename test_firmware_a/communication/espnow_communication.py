@@ -63,6 +63,18 @@ except ImportError:
 MAC_A = bytes.fromhex("5C013B4C2C34")  # Self (A)
 MAC_B = bytes.fromhex("d8bc38e470bc")  # Remote (B)
 
+# Byte -> two-digit uppercase hex, for MAC strings without per-byte format()
+_HEX = tuple("{:02X}".format(i) for i in range(256))
+
+
+def _mac_str(mac):
+    """Format a 6-byte MAC as AA:BB:CC:DD:EE:FF."""
+    return ":".join((_HEX[mac[0]], _HEX[mac[1]], _HEX[mac[2]],
+                     _HEX[mac[3]], _HEX[mac[4]], _HEX[mac[5]]))
+
+
+_MAC_B_STR = _mac_str(MAC_B)  # Peer MAC never changes: format it once
+
 # Send interval and message tracking
 _send_interval = 200  # Send sensor data every 200ms (was 2.5s - now responsive)
 REINIT_INTERVAL = 5000      # Try to recover ESP-NOW every 5 seconds when down
@@ -86,6 +98,19 @@ _esp_now = None
 _initialized = False
 _wifi = None
 _last_init_attempt = 0
+_warned_remote_version = None  # Last mismatching remote version warned about
+
+_FW_VER = config.FIRMWARE_VERSION
+
+# Sensor message layout; only the mutable fields are placeholders.
+# Numbers use %s (float or int, or "null"); the last slot is the optional
+# ',"r":<id>' reply tail.
+_SENSOR_TEMPLATE = (
+    '{"v":%s,"t":"%s","id":%s,"ts":%d,'
+    '"s":{"T":%s,"C":%s,"U":%s,"P":%s,"H":{"b":%s,"o":%s}},'
+    '"B":{"1":%s,"2":%s,"3":%s},'
+    '"A":{"L":"%s","S":%s,"M":%s}%s}'
+)
 
 
 def _get_sensor_data_string(msg_type="data", msg_id=None, reply_to_id=None):
@@ -104,71 +129,54 @@ def _get_sensor_data_string(msg_type="data", msg_id=None, reply_to_id=None):
         msg_id = _next_msg_id
         _next_msg_id += 1
     
-    hr = state.sensor_data["heart_rate"]
+    sensor_data = state.sensor_data
+    buttons = state.button_state
+    alarm = state.alarm_state
+    hr = sensor_data["heart_rate"]
     
     # Get sensor values
-    temp = state.sensor_data.get("temperature")
-    co = state.sensor_data.get("co")
-    dist = state.sensor_data.get("ultrasonic_distance_cm")
-    presence = state.sensor_data.get("ultrasonic_presence", False)
+    temp = sensor_data.get("temperature")
+    co = sensor_data.get("co")
+    dist = sensor_data.get("ultrasonic_distance_cm")
+    presence = sensor_data.get("ultrasonic_presence", False)
     bpm = hr.get("bpm") if hr else None
     spo2 = hr.get("spo2") if hr else None
-    b1 = state.button_state.get("b1", False)
-    b2 = state.button_state.get("b2", False)
-    b3 = state.button_state.get("b3", False)
-    alarm_level = state.alarm_state.get("level", "normal")
-    alarm_source = state.alarm_state.get("source")
-    sos_mode = state.alarm_state.get("sos_mode", False)
+    b1 = buttons.get("b1", False)
+    b2 = buttons.get("b2", False)
+    b3 = buttons.get("b3", False)
+    alarm_level = alarm.get("level", "normal")
+    alarm_source = alarm.get("source")
+    sos_mode = alarm.get("sos_mode", False)
     
     # Manual JSON construction to guarantee field order and minimal size
-    # This ensures compatibility with MicroPython ujson which doesn't preserve dict order
-    # Using list + join() for efficiency (string concatenation in loop is very slow in MicroPython)
-    
-    parts = [
-        "{\"v\":", str(config.FIRMWARE_VERSION), ",",
-        "\"t\":\"", msg_type, "\",",
-        "\"id\":", str(msg_id), ",",
-        "\"ts\":", str(ticks_ms()), ",",
-        "\"s\":{",
-        "\"T\":", ("null" if temp is None else str(temp)), ",",
-        "\"C\":", ("null" if co is None else str(co)), ",",
-        "\"U\":", ("null" if dist is None else str(dist)), ",",
-        "\"P\":", ("true" if presence else "false"), ",",
-        "\"H\":{",
-        "\"b\":", ("null" if bpm is None else str(bpm)), ",",
-        "\"o\":", ("null" if spo2 is None else str(spo2)),
-        "}},",
-        "\"B\":{",
-        "\"1\":", ("true" if b1 else "false"), ",",
-        "\"2\":", ("true" if b2 else "false"), ",",
-        "\"3\":", ("true" if b3 else "false"),
-        "},",
-        "\"A\":{",
-        "\"L\":\"", str(alarm_level), "\",",
-        "\"S\":", ("null" if alarm_source is None else "\"" + str(alarm_source) + "\""), ",",
-        "\"M\":", ("true" if sos_mode else "false"),
-        "}",
-    ]
-    
-    if reply_to_id is not None:
-        parts.append(",\"r\":")
-        parts.append(str(reply_to_id))
-    
-    parts.append("}")
-    json_str = "".join(parts)
+    # This ensures compatibility with MicroPython ujson which doesn't preserve dict order.
+    # One %-format over a fixed template instead of a ~60-item parts list
+    # plus join() and a str() per field.
+    json_str = _SENSOR_TEMPLATE % (
+        _FW_VER, msg_type, msg_id, ticks_ms(),
+        "null" if temp is None else temp,
+        "null" if co is None else co,
+        "null" if dist is None else dist,
+        "true" if presence else "false",
+        "null" if bpm is None else bpm,
+        "null" if spo2 is None else spo2,
+        "true" if b1 else "false",
+        "true" if b2 else "false",
+        "true" if b3 else "false",
+        alarm_level,
+        "null" if alarm_source is None else '"%s"' % alarm_source,
+        "true" if sos_mode else "false",
+        "" if reply_to_id is None else ',"r":%s' % reply_to_id,
+    )
     msg_bytes = json_str.encode("utf-8")
     
     # Check ESP-NOW size limit (250 bytes max)
     if len(msg_bytes) > 250:
         log("communication.espnow", "WARNING: Message too large ({} bytes, max 250). May be truncated!".format(len(msg_bytes)))
     
-    # Verify JSON is valid before sending
-    try:
-        json.loads(json_str)
-    except Exception as e:
-        log("communication.espnow", "ERROR: Invalid JSON generated: " + str(e))
-        log("communication.espnow", "JSON string: " + json_str[:150])
-    
+    # No parse-back check: every field is a number, a JSON keyword or an
+    # internal identifier string, so the frame is valid by construction and
+    # the check only produced a throwaway dict tree every 200 ms
     return msg_bytes
 
 
@@ -210,13 +218,9 @@ def init_espnow_comm():
             actual_mac = _wifi.config('mac')
         except (AttributeError, OSError):
             actual_mac = MAC_A  # Fallback to configured MAC
-        mac_str = ":".join("{:02X}".format(b) for b in actual_mac)
         
-        log("communication.espnow", "ESP-NOW initialized (Client mode)")
-        log("communication.espnow", "My MAC: {}".format(mac_str))
-        log("communication.espnow", "Peer added: Scheda B ({})" .format(
-            ":".join("{:02X}".format(b) for b in MAC_B)
-        ))
+        log("communication.espnow", "ESP-NOW initialized (Client mode)\n  My MAC: {}\n  Peer added: Scheda B ({})",
+            _mac_str(actual_mac), _MAC_B_STR)
         return True
     except Exception as e:
         # Check if error is because ESP-NOW already exists
@@ -357,6 +361,9 @@ def send_command(command_dict):
 def _validate_message(msg_bytes):
     """Validate message structure before JSON parsing.
     
+    UTF-8 is left to json.loads, which rejects bad input anyway; a decode
+    here would cost a str copy and a try frame on every frame.
+    
     Returns:
         True if message looks valid, False otherwise
     """
@@ -384,13 +391,6 @@ def _validate_message(msg_bytes):
         log("espnow_a", "Message doesn't end with '}}': preview={}".format(msg_bytes_for_check[-20:]))
         return False
     
-    # Basic UTF-8 validation
-    try:
-        msg_bytes_for_check.decode("utf-8")
-    except UnicodeDecodeError:
-        log("espnow_a", "Message is not valid UTF-8")
-        return False
-    
     return True
 
 
@@ -402,167 +402,158 @@ def _parse_actuator_state(msg_bytes):
     
     Or heartbeat message:
     {"v":1,"t":"heartbeat","ts":12345678}
+    
+    Only json.loads() is guarded here; any other error (e.g. a payload that
+    is not a JSON object) propagates to the single handler in update().
     """
+    # Validate message structure first
+    if not _validate_message(msg_bytes):
+        return None
+    
+    # Convert bytearray to bytes if needed
+    if isinstance(msg_bytes, bytearray):
+        msg_bytes = bytes(msg_bytes)
+    
+    # CRITICAL FIX: Strip trailing null bytes that ESP-NOW pads to 250 bytes
+    # ESP-NOW pads every message to 250-byte boundary with zeros
+    # Board B also pads with nulls, so we strip ALL trailing zeros
+    msg_bytes_original = msg_bytes
+    msg_bytes = msg_bytes.rstrip(b'\x00')
+    
+    # Only log if padding was actually removed
+    if len(msg_bytes) != len(msg_bytes_original):
+        log("espnow_a", "RX Stripped {} bytes of padding", len(msg_bytes_original) - len(msg_bytes))
+    
+    log("espnow_a", "RX Parse: msg length={} bytes", len(msg_bytes))
+    
+    # Try to parse JSON straight from the bytes (no UTF-8 decode into a
+    # str copy first; malformed input still fails as ValueError below)
     try:
-        # Validate message structure first
-        if not _validate_message(msg_bytes):
-            return None
-        
-        # Convert bytearray to bytes if needed
-        if isinstance(msg_bytes, bytearray):
-            msg_bytes = bytes(msg_bytes)
-        
-        # CRITICAL FIX: Strip trailing null bytes that ESP-NOW pads to 250 bytes
-        # ESP-NOW pads every message to 250-byte boundary with zeros
-        # Board B also pads with nulls, so we strip ALL trailing zeros
-        msg_bytes_original = msg_bytes
-        msg_bytes = msg_bytes.rstrip(b'\x00')
-        
-        # Only log if padding was actually removed
-        if len(msg_bytes) != len(msg_bytes_original):
-            log("espnow_a", "RX Stripped {} bytes of padding".format(len(msg_bytes_original) - len(msg_bytes)))
-        
-        # Decode bytes to string
-        try:
-            msg_str = msg_bytes.decode("utf-8")
-        except UnicodeDecodeError as e:
-            log("espnow_a", "RX Decode error (not valid UTF-8): {}".format(e))
-            log("espnow_a", "Raw bytes preview: {}".format(msg_bytes[:80]))
-            return None
-        
-        log("espnow_a", "RX Parse: msg_str length={} bytes".format(len(msg_str)))
-        
-        # Try to parse JSON
-        try:
-            data = json.loads(msg_str)
-        except ValueError as e:  # json.JSONDecodeError inherits from ValueError
-            log("espnow_a", "RX JSON parse error: {}".format(str(e)))
-            return None
-        
-        # Extract message metadata (compact format only)
-        msg_id = data.get("id", 0)
-        msg_type = data.get("t", "data")
-        remote_version = data.get("v")
-        
-        # Track received message ID to prevent duplicates
-        global _last_received_msg_id
-        if msg_id <= _last_received_msg_id and msg_type != "ack":
-            log("espnow_a", "Duplicate msg_id={}, ignoring".format(msg_id))
-            return None  # Return msg_id None to signal duplicate
-        if msg_type != "ack":
-            _last_received_msg_id = msg_id
-        
-        log("espnow_a", "RX: msg_id={} type={}".format(msg_id, msg_type))
-        
-        # If this is just an ACK, don't update state and DON'T send another ACK back
-        if msg_type == "ack":
-            reply_to = data.get("r")
-            log("espnow_a", "ACK received for msg_id={}".format(reply_to))
-            
-            # Update connection heartbeat
-            global _last_ack_from_b
-            _last_ack_from_b = ticks_ms()
-            
-            # Remove from pending events if it was an event waiting for ACK
-            global _pending_event_acks
-            if reply_to in _pending_event_acks:
-                del _pending_event_acks[reply_to]
-                log("espnow_a", "Event msg_id={} confirmed, removed from pending".format(reply_to))
-            
-            return -1  # Special code: ACK received, don't respond with another ACK
-        
-        # Check version (warning only, don't block communication)
-        if remote_version != config.FIRMWARE_VERSION:
-            log("communication.espnow", "WARNING: Firmware version mismatch! Local=v{}, Remote=v{}".format(
-                config.FIRMWARE_VERSION, remote_version
-            ))
-        
-        # Parse actuators (compact format only)
-        leds = data.get("L", {})
-        state.received_actuator_state["leds"]["green"] = leds.get("g", "off")
-        state.received_actuator_state["leds"]["blue"] = leds.get("b", "off")
-        state.received_actuator_state["leds"]["red"] = leds.get("r", "off")
-        
-        # Parse servo (compact)
-        servo = data.get("S", {})
-        state.received_actuator_state["servo_angle"] = servo.get("a")
-        
-        # Parse LCD (compact)
-        lcd = data.get("D", {})
-        state.received_actuator_state["lcd_line1"] = lcd.get("1", "")
-        state.received_actuator_state["lcd_line2"] = lcd.get("2", "")
-        
-        # Parse audio devices (compact)
-        state.received_actuator_state["buzzer"] = data.get("B", "OFF")
-        state.received_actuator_state["audio"] = data.get("A", "STOP")
-        # Parse SOS mode (compact)
-        state.received_actuator_state["sos_mode"] = bool(data.get("O", False))
-        
-        state.received_actuator_state["last_update"] = ticks_ms()
-        state.received_actuator_state["is_stale"] = False
-        
-        # SYNC: Update local gate_state based on servo angle from ESP32-B
-        # This keeps ESP32-A, ESP32-B, and app in sync
-        # Skip sync if gate command was recently sent (prevents race condition during queue processing)
-        from core import timers
-        gate_sync_locked = not timers.elapsed("gate_sync_lock", 1500)  # Lock for 1.5s after command
-        
-        servo_angle = state.received_actuator_state.get("servo_angle")
-        if servo_angle is not None:
-            # Gate is open when servo is at 180°, closed at 0°
-            # Use threshold: >90° = open, <=90° = closed
-            gate_is_open = servo_angle > 90
-            if state.gate_state.get("gate_open") != gate_is_open:
-                if gate_sync_locked:
-                    # Ignore sync updates during lock period to prevent race condition
-                    log("espnow_a", "SYNC: gate_open sync IGNORED (locked) - servo={}° would set gate_open={}".format(
-                        servo_angle, gate_is_open))
-                else:
-                    # Normal sync update
-                    state.gate_state["gate_open"] = gate_is_open
-                    log("espnow_a", "SYNC: gate_open updated to {} (servo={}°)".format(gate_is_open, servo_angle))
-                    # Request immediate publish to update app with new gate state
-                    try:
-                        from communication import nodered_client
-                        nodered_client.request_publish_now()
-                    except Exception:
-                        pass  # Ignore if nodered_client not available
-        
-        # SYNC: Update local alarm_state["sos_mode"] based on sos_mode from ESP32-B
-        # If ESP32-B activates SOS via physical button, propagate it to alarm_state and app
-        sos_from_b = state.received_actuator_state.get("sos_mode", False)
-        if sos_from_b != state.alarm_state.get("sos_mode", False):
-            state.alarm_state["sos_mode"] = sos_from_b
-            if sos_from_b:
-                # SOS activated on board B - set alarm to danger/manual
-                state.alarm_state["level"] = "danger"
-                state.alarm_state["source"] = "manual"
-                log("espnow_a", "SYNC: SOS activated from ESP32-B button - alarm set to danger/manual")
-            else:
-                # SOS deactivated on board B - clear alarm (only if not triggered by sensors)
-                # Check if any sensor is still critical before clearing
-                if state.alarm_state.get("level") == "danger" and state.alarm_state.get("source") == "manual":
-                    state.alarm_state["level"] = "normal"
-                    state.alarm_state["source"] = None
-                    log("espnow_a", "SYNC: SOS deactivated from ESP32-B button - alarm cleared")
-            # Request immediate publish to update app
-            try:
-                from communication import nodered_client
-                nodered_client.request_publish_now()
-            except Exception:
-                pass  # Ignore if nodered_client not available
-        
-        log("communication.espnow", "RX: Actuators - LEDs=G:{},B:{},R:{} Servo={}°".format(
-            state.received_actuator_state["leds"]["green"],
-            state.received_actuator_state["leds"]["blue"],
-            state.received_actuator_state["leds"]["red"],
-            state.received_actuator_state["servo_angle"]
-        ))
-        return msg_id  # Return msg_id to send ACK
-    except Exception as e:
-        log("communication.espnow", "Parse error: {}".format(e))
-        log("espnow_a", "RX Parse FAILED: {}".format(e))
+        data = json.loads(msg_bytes)
+    except ValueError as e:  # json.JSONDecodeError inherits from ValueError
+        log("espnow_a", "RX JSON parse error: {}".format(str(e)))
         return None
+    
+    # Extract message metadata (compact format only)
+    msg_id = data.get("id", 0)
+    msg_type = data.get("t", "data")
+    remote_version = data.get("v")
+    
+    # Track received message ID to prevent duplicates
+    global _last_received_msg_id
+    if msg_id <= _last_received_msg_id and msg_type != "ack":
+        log("espnow_a", "Duplicate msg_id={}, ignoring".format(msg_id))
+        return None  # Return msg_id None to signal duplicate
+    if msg_type != "ack":
+        _last_received_msg_id = msg_id
+    
+    log("espnow_a", "RX: msg_id={} type={}".format(msg_id, msg_type))
+    
+    # If this is just an ACK, don't update state and DON'T send another ACK back
+    if msg_type == "ack":
+        reply_to = data.get("r")
+        log("espnow_a", "ACK received for msg_id={}".format(reply_to))
+        
+        # Update connection heartbeat
+        global _last_ack_from_b
+        _last_ack_from_b = ticks_ms()
+        
+        # Remove from pending events if it was an event waiting for ACK
+        global _pending_event_acks
+        if reply_to in _pending_event_acks:
+            del _pending_event_acks[reply_to]
+            log("espnow_a", "Event msg_id={} confirmed, removed from pending".format(reply_to))
+        
+        return -1  # Special code: ACK received, don't respond with another ACK
+    
+    # Check version (warning only, don't block communication).
+    # Warn once per remote version, not on every frame.
+    global _warned_remote_version
+    if remote_version != _FW_VER and remote_version != _warned_remote_version:
+        _warned_remote_version = remote_version
+        log("communication.espnow", "WARNING: Firmware version mismatch! Local=v{}, Remote=v{}",
+            _FW_VER, remote_version)
+    
+    # Parse actuators (compact format only)
+    leds = data.get("L", {})
+    state.received_actuator_state["leds"]["green"] = leds.get("g", "off")
+    state.received_actuator_state["leds"]["blue"] = leds.get("b", "off")
+    state.received_actuator_state["leds"]["red"] = leds.get("r", "off")
+    
+    # Parse servo (compact)
+    servo = data.get("S", {})
+    state.received_actuator_state["servo_angle"] = servo.get("a")
+    
+    # Parse LCD (compact)
+    lcd = data.get("D", {})
+    state.received_actuator_state["lcd_line1"] = lcd.get("1", "")
+    state.received_actuator_state["lcd_line2"] = lcd.get("2", "")
+    
+    # Parse audio devices (compact)
+    state.received_actuator_state["buzzer"] = data.get("B", "OFF")
+    state.received_actuator_state["audio"] = data.get("A", "STOP")
+    # Parse SOS mode (compact)
+    state.received_actuator_state["sos_mode"] = bool(data.get("O", False))
+    
+    state.received_actuator_state["last_update"] = ticks_ms()
+    state.received_actuator_state["is_stale"] = False
+    
+    # SYNC: Update local gate_state based on servo angle from ESP32-B
+    # This keeps ESP32-A, ESP32-B, and app in sync
+    # Skip sync if gate command was recently sent (prevents race condition during queue processing)
+    from core import timers
+    gate_sync_locked = not timers.elapsed("gate_sync_lock", 1500)  # Lock for 1.5s after command
+    
+    servo_angle = state.received_actuator_state.get("servo_angle")
+    if servo_angle is not None:
+        # Gate is open when servo is at 180°, closed at 0°
+        # Use threshold: >90° = open, <=90° = closed
+        gate_is_open = servo_angle > 90
+        if state.gate_state.get("gate_open") != gate_is_open:
+            if gate_sync_locked:
+                # Ignore sync updates during lock period to prevent race condition
+                log("espnow_a", "SYNC: gate_open sync IGNORED (locked) - servo={}° would set gate_open={}".format(
+                    servo_angle, gate_is_open))
+            else:
+                # Normal sync update
+                state.gate_state["gate_open"] = gate_is_open
+                log("espnow_a", "SYNC: gate_open updated to {} (servo={}°)".format(gate_is_open, servo_angle))
+                # Request immediate publish to update app with new gate state
+                try:
+                    from communication import nodered_client
+                    nodered_client.request_publish_now()
+                except Exception:
+                    pass  # Ignore if nodered_client not available
+    
+    # SYNC: Update local alarm_state["sos_mode"] based on sos_mode from ESP32-B
+    # If ESP32-B activates SOS via physical button, propagate it to alarm_state and app
+    sos_from_b = state.received_actuator_state.get("sos_mode", False)
+    if sos_from_b != state.alarm_state.get("sos_mode", False):
+        state.alarm_state["sos_mode"] = sos_from_b
+        if sos_from_b:
+            # SOS activated on board B - set alarm to danger/manual
+            state.set_alarm("danger", "manual")
+            log("espnow_a", "SYNC: SOS activated from ESP32-B button - alarm set to danger/manual")
+        else:
+            # SOS deactivated on board B - clear alarm (only if not triggered by sensors)
+            # Check if any sensor is still critical before clearing
+            if state.alarm_state.get("level") == "danger" and state.alarm_state.get("source") == "manual":
+                state.set_alarm("normal", None)
+                log("espnow_a", "SYNC: SOS deactivated from ESP32-B button - alarm cleared")
+        # Request immediate publish to update app
+        try:
+            from communication import nodered_client
+            nodered_client.request_publish_now()
+        except Exception:
+            pass  # Ignore if nodered_client not available
+    
+    log("communication.espnow", "RX: Actuators - LEDs=G:{},B:{},R:{} Servo={}°".format(
+        state.received_actuator_state["leds"]["green"],
+        state.received_actuator_state["leds"]["blue"],
+        state.received_actuator_state["leds"]["red"],
+        state.received_actuator_state["servo_angle"]
+    ))
+    return msg_id  # Return msg_id to send ACK
 
 
 
@@ -577,8 +568,9 @@ def update():
     global _message_count, _last_ack_from_b, _b_is_connected, _last_received_msg_id
     
     if not _initialized or _esp_now is None:
-        # Auto-recover ESP-NOW if it went down
-        if elapsed("espnow_reinit", REINIT_INTERVAL):
+        # Auto-recover ESP-NOW if it went down. init_espnow_comm() stamps
+        # _last_init_attempt on every try, so that is the retry deadline
+        if ticks_diff(ticks_ms(), _last_init_attempt) >= REINIT_INTERVAL:
             log("espnow_a", "ESP-NOW down, attempting re-init")
             init_espnow_comm()
         return
@@ -604,10 +596,11 @@ def update():
     messages_processed = 0
     max_messages_per_cycle = 10
     valid_messages = []  # Store all valid messages
+    irecv = _esp_now.irecv  # Bound once per tick, not per frame
     
     while messages_processed < max_messages_per_cycle:
         try:
-            mac, msg = _esp_now.irecv(0)
+            mac, msg = irecv(0)
             
             if mac is None or msg is None:
                 # No more messages available
@@ -615,11 +608,7 @@ def update():
             
             messages_processed += 1
             
-            try:
-                mac_str = ":".join("{:02X}".format(b) for b in mac)
-            except Exception:
-                mac_str = str(mac)
-            log("espnow_a", "RX len={}".format(len(msg)))
+            log("espnow_a", "RX len={}", len(msg))
             
             # Validate message before storing
             if _validate_message(msg):
@@ -84,13 +84,15 @@ def _on_message(topic, msg):
             return
         
         command = payload.get("command")
-        if command not in ["sos_activate", "sos_deactivate", "gate_open", "gate_close", "query"]:
+        if command not in _APP_COMMAND_HANDLERS:
             log("nodered", "CMD RX unknown command={}: topic={}".format(command, topic_str))
             return
+        session_id = payload.get("session_id")
         
-        # Valid command, queue it
-        _command_queue.append({"topic": topic_str, "payload": payload})
-        log("nodered", "CMD RX valid: cmd={} session_id={}".format(command, payload.get("session_id")))
+        # Valid command, queue it with the fields already extracted so that
+        # process_commands() doesn't have to look them up (and re-validate) again
+        _command_queue.append({"topic": topic_str, "payload": payload, "command": command, "session_id": session_id})
+        log("nodered", "CMD RX valid: cmd={} session_id={}".format(command, session_id))
     except Exception as e:
         log("nodered", "CMD parse error: {}".format(e))
 
@@ -261,109 +263,111 @@ def get_next_command():
     Returns a dict with:
     - topic: MQTT topic where command came from
     - payload: Full command payload dict (already validated by _on_message)
+    - command: Command name extracted from payload
+    - session_id: Session ID extracted from payload (may be None)
     """
     if _command_queue:
         return _command_queue.pop(0)
     return None
 
 
-def _process_app_command(cmd_payload):
+def _app_sos_activate(session_id):
+    """sos_activate: trigger emergency alarm and publish immediately."""
+    state.set_alarm("danger", "manual", sos_mode=True)
+    publish_state_now()
+    log("nodered", "CMD: SOS activate from {}".format(session_id))
+    return {"success": True, "message": "SOS activated"}
+
+
+def _app_sos_deactivate(session_id):
+    """sos_deactivate: clear alarm and publish immediately."""
+    state.set_alarm("normal", None, sos_mode=False)
+    publish_state_now()
+    log("nodered", "CMD: SOS deactivate from {}".format(session_id))
+    return {"success": True, "message": "SOS deactivated"}
+
+
+def _forward_gate(session_id, gate_open):
+    """Forward a gate open/close to ESP32-B via ESPNow (servo 180 = open, 0 = closed)."""
+    from communication import espnow_communication
+    
+    label = "open" if gate_open else "close"
+    espnow_command = {
+        "target": "B",
+        "command": "servo",
+        "args": [180 if gate_open else 0],
+        "_source": "app",
+        "_session_id": session_id
+    }
+    if espnow_communication.send_command(espnow_command):
+        # Update local gate state optimistically
+        state.gate_state["gate_open"] = gate_open
+        # Lock gate sync for 1.5s to prevent race condition
+        # (prevents ESP32-B's queued state from overwriting before execution)
+        from core import timers
+        timers.elapsed("gate_sync_lock", 0)  # Reset timer
+        # Publish immediately to confirm state change to app
+        publish_state_now()
+        log("nodered", "CMD: Gate {} forwarded to B from {} (sync locked 1.5s)".format(label, session_id))
+        return {"success": True, "message": "Gate " + label + " command sent to B"}
+    log("nodered", "CMD: Gate {} forward failed from {}".format(label, session_id))
+    return {"success": False, "message": "Failed to forward gate " + label + " to B"}
+
+
+def _app_gate_open(session_id):
+    """gate_open: forward servo 180 to ESP32-B."""
+    return _forward_gate(session_id, True)
+
+
+def _app_gate_close(session_id):
+    """gate_close: forward servo 0 to ESP32-B."""
+    return _forward_gate(session_id, False)
+
+
+def _app_query(session_id):
+    """query: publish current state immediately."""
+    publish_state_now()
+    log("nodered", "CMD: Query from {}".format(session_id))
+    return {"success": True, "message": "State published"}
+
+
+# App command name -> handler(session_id). Also the set of accepted commands
+# checked by _on_message before queueing.
+_APP_COMMAND_HANDLERS = {
+    "sos_activate": _app_sos_activate,
+    "sos_deactivate": _app_sos_deactivate,
+    "gate_open": _app_gate_open,
+    "gate_close": _app_gate_close,
+    "query": _app_query,
+}
+
+
+def _process_app_command(command, session_id):
     """Process an incoming app command from the protocol.
     
-    Maps app commands to internal ESP32-A operations:
+    Maps app commands to internal ESP32-A operations via _APP_COMMAND_HANDLERS:
     - sos_activate -> alarm trigger
     - sos_deactivate -> alarm clear
     - gate_open -> forward to ESP32-B via ESPNow
     - gate_close -> forward to ESP32-B via ESPNow
     - query -> immediate state publish
     
+    Args:
+        command: Command name (already validated by _on_message)
+        session_id: Session ID from the payload (None if missing)
+    
     Returns:
         dict with 'success' (bool) and 'message' (string)
     """
-    from communication import espnow_communication
-    
-    command = cmd_payload.get("command", "")
-    session_id = cmd_payload.get("session_id", "unknown")
+    if session_id is None:
+        session_id = "unknown"
     
     try:
-        if command == "sos_activate":
-            # Trigger emergency alarm
-            state.alarm_state["level"] = "danger"
-            state.alarm_state["source"] = "manual"
-            state.alarm_state["sos_mode"] = True
-            # Publish immediately
-            publish_state_now()
-            log("nodered", "CMD: SOS activate from {}".format(session_id))
-            return {"success": True, "message": "SOS activated"}
-        
-        elif command == "sos_deactivate":
-            # Clear alarm
-            state.alarm_state["level"] = "normal"
-            state.alarm_state["source"] = None
-            state.alarm_state["sos_mode"] = False
-            # Publish immediately
-            publish_state_now()
-            log("nodered", "CMD: SOS deactivate from {}".format(session_id))
-            return {"success": True, "message": "SOS deactivated"}
-        
-        elif command == "gate_open":
-            # Forward gate open command to ESP32-B via ESPNow
-            # Gate open = servo at 180 degrees
-            espnow_command = {
-                "target": "B",
-                "command": "servo",
-                "args": [180],
-                "_source": "app",
-                "_session_id": session_id
-            }
-            if espnow_communication.send_command(espnow_command):
-                # Update local gate state optimistically
-                state.gate_state["gate_open"] = True
-                # Lock gate sync for 1.5s to prevent race condition
-                # (prevents ESP32-B's queued state from overwriting before execution)
-                from core import timers
-                timers.elapsed("gate_sync_lock", 0)  # Reset timer
-                # Publish immediately to confirm state change to app
-                publish_state_now()
-                log("nodered", "CMD: Gate open forwarded to B from {} (sync locked 1.5s)".format(session_id))
-                return {"success": True, "message": "Gate open command sent to B"}
-            else:
-                log("nodered", "CMD: Gate open forward failed from {}".format(session_id))
-                return {"success": False, "message": "Failed to forward gate open to B"}
-        
-        elif command == "gate_close":
-            # Forward gate close command to ESP32-B via ESPNow
-            # Gate close = servo at 0 degrees
-            espnow_command = {
-                "target": "B",
-                "command": "servo",
-                "args": [0],
-                "_source": "app",
-                "_session_id": session_id
-            }
-            if espnow_communication.send_command(espnow_command):
-                # Update local gate state optimistically
-                state.gate_state["gate_open"] = False
-                # Lock gate sync for 1.5s to prevent race condition
-                from core import timers
-                timers.elapsed("gate_sync_lock", 0)  # Reset timer
-                # Publish immediately to confirm state change to app
-                publish_state_now()
-                log("nodered", "CMD: Gate close forwarded to B from {} (sync locked 1.5s)".format(session_id))
-                return {"success": True, "message": "Gate close command sent to B"}
-            else:
-                log("nodered", "CMD: Gate close forward failed from {}".format(session_id))
-                return {"success": False, "message": "Failed to forward gate close to B"}
-        
-        elif command == "query":
-            # Publish current state immediately
-            publish_state_now()
-            log("nodered", "CMD: Query from {}".format(session_id))
-            return {"success": True, "message": "State published"}
-        
-        else:
+        handler = _APP_COMMAND_HANDLERS.get(command)
+        if handler is None:
             log("nodered", "CMD: Unknown command {} from {}".format(command, session_id))
             return {"success": False, "message": "Unknown command: {}".format(command)}
+        return handler(session_id)
     
     except Exception as e:
         log("nodered", "CMD process error: {}".format(e))
@@ -381,11 +385,8 @@ def process_commands():
             break
         
         try:
-            payload = cmd.get("payload", {})
-            if payload.get("msg_type") == "command":
-                _process_app_command(payload)
-            else:
-                log("nodered", "Unexpected payload msg_type: {}".format(payload.get("msg_type")))
+            # msg_type/command were validated once in _on_message, no need to re-check
+            _process_app_command(cmd["command"], cmd["session_id"])
         except Exception as e:
             log("nodered", "Error processing queued command: {}".format(e))
 
@@ -1,7 +1,7 @@
 """UDP command listener for development and testing.
 
 Imported by: main.py
-Imports: socket (MicroPython), ujson, debug.debug, communication.command_handler
+Imports: socket, select (MicroPython), ujson, debug.debug, communication.command_handler
 
 Listens for incoming UDP commands on port 37022 and passes them to command_handler.
 Uses non-blocking socket to integrate seamlessly with main loop.
@@ -21,6 +21,10 @@ Protocol: JSON messages on UDP port 37022
 """
 
 import socket
+try:
+    import uselect as select  # type: ignore  # MicroPython
+except ImportError:
+    import select  # Fallback
 try:
     import ujson as json  # type: ignore  # MicroPython
 except ImportError:
@@ -30,13 +34,21 @@ from communication import command_handler
 
 # Configuration
 UDP_COMMAND_PORT = 37022  # Port to listen for commands
+_OWN_TARGETS = ("A", "a")  # Accepted "target" values, no per-packet upper()
+# Largest command frame accepted. Real commands are well under 200 bytes;
+# anything bigger is dropped before decode/json.loads allocate for it.
+_MAX_CMD_LEN = 512
 _socket = None
+_poller = None  # select.poll() with _socket registered for POLLIN
 _initialized = False
 
 
 def init():
     """Initialize UDP command listener (non-blocking socket)."""
-    global _socket, _initialized
+    global _socket, _poller, _initialized
+    
+    # Release any socket left from a previous init so re-init can rebind
+    deinit()
     
     try:
         _socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -44,6 +56,10 @@ def init():
         _socket.bind(('', UDP_COMMAND_PORT))
         _socket.setblocking(False)  # Non-blocking for integration with main loop
         
+        # Poll for readability so idle update() calls skip recvfrom entirely
+        _poller = select.poll()
+        _poller.register(_socket, select.POLLIN)
+        
         _initialized = True
         log("communication.udp_cmd", "UDP command listener started on port {}".format(UDP_COMMAND_PORT))
         return True
@@ -54,6 +70,30 @@ def init():
         return False
 
 
+def deinit():
+    """Close the UDP command socket and drop it from the poller.
+    
+    Safe to call when not initialized; init() calls it before rebinding.
+    """
+    global _socket, _poller, _initialized
+    
+    _initialized = False
+    if _socket is None:
+        return
+    
+    try:
+        if _poller is not None:
+            _poller.unregister(_socket)
+    except Exception:
+        pass
+    try:
+        _socket.close()
+    except Exception:
+        pass
+    _socket = None
+    _poller = None
+
+
 def update():
     """Check for incoming commands (non-blocking).
     
@@ -62,13 +102,22 @@ def update():
     if not _initialized or not _socket:
         return
     
+    # Zero-timeout poll: nothing pending is the common case, no recvfrom needed
+    if not _poller.poll(0):
+        return
+    
     try:
         # Try to receive data (non-blocking)
-        data, addr = _socket.recvfrom(1024)
+        # One byte over the limit is enough to tell an oversized frame apart
+        data, addr = _socket.recvfrom(_MAX_CMD_LEN + 1)
         
         if not data:
             return
         
+        if len(data) > _MAX_CMD_LEN:
+            log("communication.udp_cmd", "Dropped oversized command frame (> {} bytes)", _MAX_CMD_LEN)
+            return
+        
         # Decode and parse JSON
         try:
             message = data.decode('utf-8')
@@ -80,8 +129,7 @@ def update():
                 return
             
             # Check if this command is for us (target A)
-            target = cmd_data.get("target", "").upper()
-            if target != "A":
+            if cmd_data.get("target") not in _OWN_TARGETS:
                 # Not for us, ignore
                 return
             
@@ -1,7 +1,8 @@
 """Shared state module for ESP32-A (Sensor Board).
 
 Imported by: main.py, core.sensor_loop, logic.alarm_logic, sensors.*, 
-             communication.espnow_communication, communication.command_handler
+             communication.espnow_communication, communication.command_handler,
+             communication.nodered_client
 Imports: None (pure data module)
 
 This module provides centralized state storage accessible by all subsystems.
@@ -47,6 +48,18 @@ alarm_state = {
     "sos_mode": False,  # True when SOS active (from app or board B button) - prevents auto-clear by sensors
 }
 
+
+def set_alarm(level, source, sos_mode=None):
+    """Convenience setter for alarm level and source (and sos_mode if given).
+
+    Used by the command and sync paths; alarm_logic writes the dict directly.
+    """
+    alarm_state["level"] = level
+    alarm_state["source"] = source
+    if sos_mode is not None:
+        alarm_state["sos_mode"] = sos_mode
+
+
 # Gate control state (for presence-based automation)
 gate_state = {
     "presence_detected": False,     # True when ultrasonic detects presence < threshold
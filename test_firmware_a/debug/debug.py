@@ -33,7 +33,7 @@ Remote logging:
 
 Usage:
   from debug.debug import log
-  log("sensor.co", "CO reading: {} PPM".format(value))
+  log("sensor.co", "CO reading: {} PPM", value)  # formatted only if channel enabled
 """
 
 from time import ticks_ms  # type: ignore
@@ -45,6 +45,11 @@ _remote_log = None
 # Hierarchy: sensor.<name>.<type>, actuator.<name>.<type>, communication.<board>.<type>, alarm.<type>, core.<type>
 _log_flags = {"*": True}
 
+# Resolved enabled/disabled per channel name, so the prefix scan in
+# is_log_enabled() runs once per channel instead of on every log() call.
+# Cleared whenever a flag changes.
+_resolved_flags = {}
+
 
 def set_log_enabled(name, enabled=True):
     """Enable/disable logs for a specific channel or hierarchy.
@@ -56,14 +61,25 @@ def set_log_enabled(name, enabled=True):
       set_log_enabled("alarm", False)               # Disable all alarm logs
     """
     _log_flags[name] = bool(enabled)
+    _resolved_flags.clear()
 
 
 def set_all_logs(enabled=True):
     """Enable/disable all logs via wildcard."""
     _log_flags["*"] = bool(enabled)
+    _resolved_flags.clear()
 
 
 def is_log_enabled(name):
+    """Check if a channel is allowed to log (cached result of _resolve_log_flag)."""
+    enabled = _resolved_flags.get(name)
+    if enabled is None:
+        enabled = _resolve_log_flag(name)
+        _resolved_flags[name] = enabled
+    return enabled
+
+
+def _resolve_log_flag(name):
     """Check if a channel is allowed to log using hierarchical prefix matching.
     
     Logic:
@@ -118,11 +134,19 @@ def init_remote_logging(device_id):
         print("debug: Remote logging not available: {}".format(e))
 
 
-def log(name, message):
-    """Simple logging function for test firmware with hierarchical per-channel flags."""
+def log(name, message, *args):
+    """Simple logging function for test firmware with hierarchical per-channel flags.
+
+    If args are given, message is a str.format() template that is formatted
+    only when the channel is enabled, so disabled channels cost no formatting:
+      log("actuator.servo", "Angle set to {}", angle)
+    """
     if not is_log_enabled(name):
         return
 
+    if args:
+        message = message.format(*args)
+
     timestamp = ticks_ms()
     log_line = "[{}ms] [{}] {}".format(timestamp, name, message)
     
@@ -34,9 +34,13 @@ import network
 LOG_SERVER_PORT = 37021  # Port where PC listener is running
 LOG_BROADCAST_IP = "255.255.255.255"  # Broadcast to all devices on network
 
+# Destination address built once; broadcast target never changes at runtime
+_LOG_ADDR = (LOG_BROADCAST_IP, LOG_SERVER_PORT)
+
 # Module state
 _udp_socket = None
 _device_id = None  # 'A' or 'B'
+_line_prefix = ""  # "[<device_id>][", built once in init()
 _enabled = False
 
 
@@ -46,9 +50,10 @@ def init(device_id):
     Args:
         device_id: 'A' for ESP32-A (sensors), 'B' for ESP32-B (actuators)
     """
-    global _udp_socket, _device_id, _enabled
+    global _udp_socket, _device_id, _line_prefix, _enabled
     
     _device_id = device_id
+    _line_prefix = "[" + str(device_id) + "]["
     
     try:
         # Check if WiFi is connected
@@ -79,18 +84,18 @@ def send_log(module, message):
         module: Module name (e.g., "main", "comm", "sensors")
         message: Log message string
     """
-    global _udp_socket, _device_id, _enabled
+    global _enabled
     
     if not _enabled or not _udp_socket:
         return
     
     try:
         # Format: "[DEVICE_ID][module] message"
-        log_line = "[{}][{}] {}".format(_device_id, module, message)
+        log_line = _line_prefix + module + "] " + str(message)
         data = log_line.encode('utf-8')
         
         # Broadcast to network
-        _udp_socket.sendto(data, (LOG_BROADCAST_IP, LOG_SERVER_PORT))
+        _udp_socket.sendto(data, _LOG_ADDR)
         
     except Exception as e:
         # Don't print to avoid recursion, just disable
@@ -29,7 +29,7 @@ and require manual reflash via USB cable.
 import network  # type: ignore
 import urequests  # type: ignore
 import machine  # type: ignore
-from time import time, sleep  # type: ignore
+from time import ticks_ms, ticks_diff, time, sleep  # type: ignore
 import os
 import gc
 from machine import Pin  # type: ignore
@@ -60,9 +60,11 @@ def _connect_wifi(timeout=15):
     wlan.active(True)
     wlan.connect(WIFI_SSID, WIFI_PASSWORD)
 
-    start = time()
+    # Integer ms ticks: avoids soft-float time() math in the wait loop
+    timeout_ms = timeout * 1000
+    start = ticks_ms()
     while not wlan.isconnected():
-        if time() - start > timeout:
+        if ticks_diff(ticks_ms(), start) > timeout_ms:
             log("ota", "WiFi connection failed")
             return False
         sleep(0.2)
@@ -74,9 +76,10 @@ def _connect_wifi(timeout=15):
 
 def _check_button_pressed():
     btn = Pin(UPDATE_BUTTON_PIN, Pin.IN, Pin.PULL_UP)
-    start = time()
+    hold_ms = UPDATE_HOLD_TIME * 1000
+    start = ticks_ms()
 
-    while time() - start < UPDATE_HOLD_TIME:
+    while ticks_diff(ticks_ms(), start) < hold_ms:
         if btn.value() == 0:  # released
             return False
         sleep(0.05)
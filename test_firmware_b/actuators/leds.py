@@ -33,6 +33,14 @@ _initialized = False
 # State for each LED: mode (off/on/blinking) and blinking parameters
 _led_runtime = {}
 
+# Red LED indication per alarm level: (mode, blink_interval_ms, on_duration_ms, label)
+# Unknown levels fall back to "normal". One lookup + tuple unpack per alarm update.
+_ALARM_RED = {
+    "normal": ("off", None, None, "RED LED OFF (normal)"),
+    "warning": ("blinking", 500, 250, "RED LED BLINKING (warning)"),
+    "danger": ("on", None, None, "RED LED ON (danger)"),
+}
+
 
 def init_leds():
     global _led_pins, _led_order, _initialized, _led_runtime
@@ -89,15 +97,9 @@ def apply_alarm(level):
     """Apply alarm indication on red LED based on level."""
     if not _initialized:
         return
-    if level == "danger":
-        set_led_state("red", "on")
-        log("actuator.leds", "apply_alarm: RED LED ON (danger)")
-    elif level == "warning":
-        set_led_state("red", "blinking", blink_interval_ms=500, on_duration_ms=250)
-        log("actuator.leds", "apply_alarm: RED LED BLINKING (warning)")
-    else:
-        set_led_state("red", "off")
-        log("actuator.leds", "apply_alarm: RED LED OFF (normal)")
+    mode, interval_ms, on_ms, label = _ALARM_RED.get(level) or _ALARM_RED["normal"]
+    set_led_state("red", mode, blink_interval_ms=interval_ms, on_duration_ms=on_ms)
+    log("actuator.leds", "apply_alarm: " + label)
 
 
 def _all_off():
@@ -1,7 +1,8 @@
 """Transport-agnostic command handler for ESP32-B (Actuator Board).
 
-Imported by: communication.udp_commands
-Imports: debug.debug, core.state, core.timers
+Imported by: communication.udp_commands, communication.espnow_communication
+Imports: debug.debug, core.state, core.timers, communication.wifi, config.config,
+         actuators.* (optional), ujson, machine, time, os
 
 Interprets and executes commands from any source (UDP, MQTT, HTTP).
 Commands are transport-agnostic - this module only handles command logic.
@@ -20,9 +21,129 @@ Supported commands:
 All commands return: {"success": bool, "message": str, ...extra_data}
 """
 
+import os
+import time  # type: ignore
+import machine  # type: ignore
+try:
+    import ujson as json  # type: ignore  # MicroPython
+except ImportError:
+    import json  # Fallback
 from debug.debug import log, set_log_enabled, set_all_logs, get_log_flags
 from core import state
 from core import timers
+from core.timers import _user_actions  # Live lock dict (never rebound by timers)
+from communication import wifi
+from config.config import FIRMWARE_VERSION, SERVO_MAX_ANGLE
+
+# Actuator drivers, resolved once at import instead of on every command.
+# None when a driver is unavailable; handlers then fall back to state-only
+# updates (calling through None raises and lands in the same except path).
+try:
+    from actuators import leds as _leds_mod
+except ImportError:
+    _leds_mod = None
+try:
+    from actuators import servo as _servo_mod
+except ImportError:
+    _servo_mod = None
+try:
+    from actuators import lcd as _lcd_mod
+except ImportError:
+    _lcd_mod = None
+try:
+    from actuators import buzzer as _buzzer_mod
+except ImportError:
+    _buzzer_mod = None
+try:
+    from actuators import audio as _audio_mod
+except ImportError:
+    _audio_mod = None
+
+_MAX_ARGS = 8  # Upper bound on args accepted per command
+
+# Accepted argument values, built once (no per-call list literals)
+_ON_OFF = frozenset(("on", "off"))
+_MODE_VALUES = frozenset(("real", "sim", "simulation"))
+_SIM_MODES = frozenset(("sim", "simulation"))
+_LOG_ON_VALUES = frozenset(("on", "true", "1"))
+_LOG_OFF_VALUES = frozenset(("off", "false", "0"))
+_LOG_ALL_TARGETS = frozenset(("all", "*"))
+
+# LCD line argument -> state key (validates and normalizes in one lookup)
+_LCD_LINE_MAP = {"1": "line1", "2": "line2", "line1": "line1", "line2": "line2"}
+_LCD_COLS = 16  # LCD 1602A characters per line
+_AUDIO_MAX_VOLUME = 30  # DFPlayer Mini volume range is 0-30
+_AUDIO_MAX_TRACK = 2999  # DFPlayer Mini track numbers are 1-2999
+
+# LED (color, mode) -> shared success reply. Doubles as the argument check:
+# any pair missing here is rejected before touching hardware or state.
+_LED_RESPONSES = {
+    (color, mode): {"success": True, "message": "LED " + color + " set to " + mode}
+    for color in ("green", "blue", "red")
+    for mode in ("on", "off", "blinking", "auto")
+}
+
+# Simple audio actions: action -> (playing, audio driver function, shared reply)
+_AUDIO_SIMPLE = {
+    "play": (True, "play_first", {"success": True, "message": "Audio playing"}),
+    "pause": (False, "stop", {"success": True, "message": "Audio paused"}),
+    "stop": (False, "stop", {"success": True, "message": "Audio stopped"}),
+}
+
+# Fixed error responses, shared rather than rebuilt per bad call.
+# Callers only read responses; never mutate these.
+_ERR_LED_USAGE = {"success": False, "message": "Usage: led <color> <state>"}
+_ERR_LED_VALUE = {"success": False, "message": "Invalid LED. Use: green|blue|red on|off|blinking|auto"}
+_ERR_SERVO_USAGE = {"success": False, "message": "Usage: servo <angle>"}
+_ERR_SERVO_ANGLE = {"success": False, "message": "Invalid servo angle"}
+_ERR_SERVO_RANGE = {"success": False, "message": "Angle must be 0-" + str(SERVO_MAX_ANGLE)}
+_ERR_LCD_USAGE = {"success": False, "message": "Usage: lcd <line> <text> or lcd backlight <on|off>"}
+_ERR_LCD_BACKLIGHT_USAGE = {"success": False, "message": "Usage: lcd backlight <on|off>"}
+_ERR_LCD_LINE = {"success": False, "message": "Invalid LCD line. Use: line1, line2"}
+_ERR_BUZZER_USAGE = {"success": False, "message": "Usage: buzzer <state>"}
+_ERR_AUDIO_USAGE = {"success": False, "message": "Usage: audio <play|pause|stop|volume|track> [params]"}
+_ERR_AUDIO_ACTION = {"success": False, "message": "Invalid audio action. Use: play, pause, stop, volume, track"}
+_ERR_AUDIO_VOLUME = {"success": False, "message": "Usage: audio volume <level>"}
+_ERR_AUDIO_TRACK = {"success": False, "message": "Usage: audio track <number>"}
+_ERR_AUDIO_VOLUME_RANGE = {"success": False, "message": "Volume must be 0-" + str(_AUDIO_MAX_VOLUME)}
+_ERR_AUDIO_TRACK_RANGE = {"success": False, "message": "Track must be 1-" + str(_AUDIO_MAX_TRACK)}
+_ERR_MODE_USAGE = {"success": False, "message": "Usage: mode <real|sim>"}
+_ERR_MODE_INVALID = {"success": False, "message": "Invalid mode. Use: real, sim"}
+_ERR_LOG_USAGE = {"success": False, "message": "Usage: log <channel|all|status> <on|off>"}
+_ERR_LOG_SET_USAGE = {"success": False, "message": "Usage: log <channel|all> <on|off>"}
+_ERR_LOG_VALUE = {"success": False, "message": "Second arg must be on/off"}
+
+# Fixed success reply for reboot (flag set, main loop does the reset)
+_RESP_REBOOT = {"success": True, "message": "System will reboot shortly."}
+
+# config.json lives under config/ on a deployed board; root copy is a fallback
+_CONFIG_PATHS = ("config/config.json", "config.json")
+
+
+def _config_path():
+    """Return the first existing config.json path (probed with os.stat)."""
+    for path in _CONFIG_PATHS:
+        try:
+            os.stat(path)
+            return path
+        except OSError:
+            pass
+    return _CONFIG_PATHS[0]
+
+
+def _load_config():
+    """Load config.json as a dict ({} if missing or unreadable)."""
+    try:
+        with open(_config_path(), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_config(config_data):
+    """Write config dict back to the config.json path in use."""
+    with open(_config_path(), "w") as f:
+        json.dump(config_data, f)
 
 
 def handle_command(command, args):
@@ -35,100 +156,70 @@ def handle_command(command, args):
     Returns:
         dict: Response with 'success' (bool) and 'message' (string)
     """
-    try:
-        command = command.lower()
-        
-        # LED control: led <color> <state>
-        if command == "led":
-            return _handle_led(args)
-        
-        # Servo control: servo <angle>
-        elif command == "servo":
-            return _handle_servo(args)
-        
-        # LCD control: lcd <line> <text...>
-        elif command == "lcd":
-            return _handle_lcd(args)
-        
-        # Buzzer control: buzzer <state>
-        elif command == "buzzer":
-            return _handle_buzzer(args)
-        
-        # Audio control: audio <action> [params]
-        elif command == "audio":
-            return _handle_audio(args)
-        
-        # Get current state: state
-        elif command == "state":
-            return _handle_state(args)
-        
-        # Get system status: status
-        elif command == "status":
-            return _handle_status(args)
-        
-        # Show active user locks: locks
-        elif command == "locks":
-            return _handle_locks(args)
-        
-        # Trigger OTA update: update
-        elif command == "update":
-            return _handle_update(args)
-        
-        # Trigger system reboot: reboot
-        elif command == "reboot":
-            return _handle_reboot(args)
-        
-        # Change simulation mode: mode <real|sim>
-        elif command == "mode":
-            return _handle_mode(args)
-
-        # Logging control: log <channel|all|status> <on|off>
-        elif command == "log":
-            return _handle_log(args)
-        
-        else:
-            return {"success": False, "message": "Unknown command: {}".format(command)}
+    # No catch-all here: handlers validate their own arguments and guard
+    # hardware calls; anything unexpected propagates to the transport
+    # (udp_commands / espnow_communication), which logs and reports it.
     
-    except Exception as e:
-        log("communication.cmd_handler", "Error handling command '{}': {}".format(command, e))
-        return {"success": False, "message": "Error: {}".format(e)}
+    # No command takes more than a handful of args; drop any excess a peer
+    # sends so handlers never walk an oversized list
+    if len(args) > _MAX_ARGS:
+        args = args[:_MAX_ARGS]
+    
+    # Single hashed lookup instead of an if/elif ladder over every command.
+    # Commands normally arrive lowercase; lower() only runs on a miss.
+    handler = COMMAND_TABLE.get(command) or COMMAND_TABLE.get(command.lower())
+    if handler is None:
+        return {"success": False, "message": "Unknown command: " + command}
+    return handler(args)
+
+
+def _complete(lock_name, msg):
+    """Shared success tail: hold off auto logic, log and build the reply."""
+    timers.set_user_lock(lock_name)
+    log("communication.cmd_handler", msg)
+    return {"success": True, "message": msg}
 
 
 def _handle_led(args):
     """Handle LED command: led <color> <state>"""
     if len(args) < 2:
-        return {"success": False, "message": "Usage: led <color> <state>"}
+        return _ERR_LED_USAGE
     
     color = args[0]
     mode = args[1]
+    response = _LED_RESPONSES.get((color, mode))
+    if response is None:
+        color = color.lower()
+        mode = mode.lower()
+        response = _LED_RESPONSES.get((color, mode))
+        if response is None:
+            return _ERR_LED_VALUE
 
     # Auto mode releases user lock so logic can drive LEDs again
     if mode == "auto":
         timers.clear_user_lock("led_update")
-        log("communication.cmd_handler", "LED {} back to auto".format(color))
-        return {"success": True, "message": "LED {} set to auto".format(color)}
+        log("communication.cmd_handler", response["message"])
+        return response
     
-    # Args are already validated and normalized by send_command.py
     # Update hardware (if initialized) and state
     try:
-        from actuators import leds as leds_module
-        leds_module.set_led_state(color, mode)
+        _leds_mod.set_led_state(color, mode)
     except Exception:
         # Fallback: state only if hardware not available
-        state.actuator_state["led_modes"][color] = mode
-        state.actuator_state["leds"][color] = (mode == "on")
+        actuator_state = state.actuator_state
+        actuator_state["led_modes"][color] = mode
+        actuator_state["leds"][color] = (mode == "on")
 
     # Mark user override window for LED logic (if any auto-logic uses this name)
     timers.set_user_lock("led_update")
-    
-    log("communication.cmd_handler", "LED {} set to {}".format(color, mode))
-    return {"success": True, "message": "LED {} set to {}".format(color, mode)}
+    log("communication.cmd_handler", response["message"])
+    return response
 
 
 def _handle_servo(args):
     """Handle servo command: servo <angle>"""
     if len(args) < 1:
-        return {"success": False, "message": "Usage: servo <angle>"}
+        return _ERR_SERVO_USAGE
     
     # Args are already validated and normalized by send_command.py
     value = args[0]
@@ -138,76 +229,91 @@ def _handle_servo(args):
         log("communication.cmd_handler", "Servo back to auto")
         return {"success": True, "message": "Servo set to auto"}
 
-    angle = int(value)
+    try:
+        angle = int(value)
+    except (ValueError, TypeError):
+        return _ERR_SERVO_ANGLE
+    if not 0 <= angle <= SERVO_MAX_ANGLE:
+        return _ERR_SERVO_RANGE
     
     # Apply immediately to hardware if available
     try:
-        from actuators import servo as servo_module
-        servo_module.set_servo_angle_immediate(angle, source="command")
+        _servo_mod.set_servo_angle_immediate(angle, source="command")
     except Exception:
         # Fallback to state-only
         state.actuator_state["servo"]["angle"] = angle
 
     # Protect servo from auto overrides for 20s
-    timers.set_user_lock("servo_update")
-    
-    log("communication.cmd_handler", "Servo set to {} degrees".format(angle))
-    return {"success": True, "message": "Servo set to {} degrees".format(angle)}
+    return _complete("servo_update", "Servo set to " + str(angle) + " degrees")
 
 
 def _handle_lcd(args):
     """Handle LCD command: lcd <line> <text...> or lcd backlight <on|off>"""
     if len(args) < 2:
-        return {"success": False, "message": "Usage: lcd <line> <text> or lcd backlight <on|off>"}
+        return _ERR_LCD_USAGE
+    
+    target = args[0]
+    if target != "backlight" and target not in _LCD_LINE_MAP:
+        target = target.lower()
     
     # Check if this is a backlight command
-    if args[0].lower() == "backlight":
-        mode = args[1].lower()
-        if mode not in ["on", "off"]:
-            return {"success": False, "message": "Usage: lcd backlight <on|off>"}
+    if target == "backlight":
+        mode = args[1]
+        if mode not in _ON_OFF:
+            mode = mode.lower()
+            if mode not in _ON_OFF:
+                return _ERR_LCD_BACKLIGHT_USAGE
         
         enabled = (mode == "on")
         try:
-            from actuators import lcd as lcd_module
-            lcd_module.set_backlight(enabled)
+            _lcd_mod.set_backlight(enabled)
         except Exception:
             pass
         
-        log("communication.cmd_handler", "LCD backlight set to {}".format(mode))
-        return {"success": True, "message": "LCD backlight set to {}".format(mode)}
+        msg = "LCD backlight set to " + mode
+        log("communication.cmd_handler", msg)
+        return {"success": True, "message": msg}
     
     # Normal LCD text command
-    line = args[0]
+    line = _LCD_LINE_MAP.get(target)
+    if line is None:
+        return _ERR_LCD_LINE
     text = args[1]
 
     if text == "auto":
         timers.clear_user_lock("lcd_update")
-        log("communication.cmd_handler", "LCD back to auto ({})".format(line))
-        return {"success": True, "message": "LCD {} set to auto".format(line)}
+        msg = "LCD " + line + " set to auto"
+        log("communication.cmd_handler", msg)
+        return {"success": True, "message": msg}
+    
+    # Store what the display can actually show, so state matches the panel
+    # and the unchanged-text check below compares like with like
+    text = text[:_LCD_COLS]
     
+    lcd_state = state.actuator_state["lcd"]
+    # Same text already on a user-held display: skip the I2C rewrite
+    unchanged = lcd_state.get(line) == text and timers.user_override_active("lcd_update")
+
     # Update state first
-    state.actuator_state["lcd"][line] = text
+    lcd_state[line] = text
 
     # Apply to hardware if available by displaying both lines
-    try:
-        from actuators import lcd as lcd_module
-        l1 = state.actuator_state["lcd"].get("line1", "")
-        l2 = state.actuator_state["lcd"].get("line2", "")
-        lcd_module.display_custom(l1, l2)  # This sets _displaying_custom = True internally
-    except Exception:
-        pass
+    if not unchanged:
+        try:
+            l1 = lcd_state.get("line1", "")
+            l2 = lcd_state.get("line2", "")
+            _lcd_mod.display_custom(l1, l2)  # This sets _displaying_custom = True internally
+        except Exception:
+            pass
 
     # Protect LCD from auto overrides until "auto" command is sent
-    timers.set_user_lock("lcd_update")
-    
-    log("communication.cmd_handler", "LCD {} set to: {}".format(line, text))
-    return {"success": True, "message": "LCD {} set to: {}".format(line, text)}
+    return _complete("lcd_update", "LCD " + line + " set to: " + text)
 
 
 def _handle_buzzer(args):
     """Handle buzzer command: buzzer <state>"""
     if len(args) < 1:
-        return {"success": False, "message": "Usage: buzzer <state>"}
+        return _ERR_BUZZER_USAGE
     
     # Args are already validated and normalized by send_command.py
     mode = args[0]
@@ -218,171 +324,161 @@ def _handle_buzzer(args):
         return {"success": True, "message": "Buzzer set to auto"}
 
     desired_on = (mode == "on")
-    state.actuator_state["buzzer"]["active"] = desired_on
+    buzzer_state = state.actuator_state["buzzer"]
 
-    try:
-        from actuators import buzzer as buzzer_module
-        buzzer_module.set_tone(1000 if desired_on else 0)
-    except Exception:
-        pass
+    # Only touch the PWM when the requested state differs from the current one
+    if buzzer_state["active"] != desired_on:
+        buzzer_state["active"] = desired_on
+        try:
+            _buzzer_mod.set_tone(1000 if desired_on else 0)
+        except Exception:
+            pass
 
-    timers.set_user_lock("buzzer_update")
-    
-    log("communication.cmd_handler", "Buzzer set to {}".format(mode))
-    return {"success": True, "message": "Buzzer set to {}".format(mode)}
+    return _complete("buzzer_update", "Buzzer set to " + mode)
 
 
 def _handle_audio(args):
     """Handle audio command: audio <action> [params]"""
     if len(args) < 1:
-        return {"success": False, "message": "Usage: audio <play|pause|stop|volume|track> [params]"}
+        return _ERR_AUDIO_USAGE
     
     # Args are already validated and normalized by send_command.py
+    action_fn = _AUDIO_DISPATCH.get(args[0])
+    if action_fn is None:
+        return _ERR_AUDIO_ACTION
+    return action_fn(args)
+
+
+def _audio_simple(args):
+    """audio play|pause|stop: set state, call driver, shared reply."""
     action = args[0]
-    
-    if action == "play":
-        state.actuator_state["audio"]["playing"] = True
-        state.actuator_state["audio"]["last_cmd"] = "play"
-        try:
-            from actuators import audio as audio_module
-            audio_module.play_first()
-        except Exception:
-            pass
-            timers.set_user_lock("audio_update")
-        log("communication.cmd_handler", "Audio play")
-        return {"success": True, "message": "Audio playing"}
-    
-    elif action == "pause":
-        state.actuator_state["audio"]["playing"] = False
-        state.actuator_state["audio"]["last_cmd"] = "pause"
-        try:
-            from actuators import audio as audio_module
-            audio_module.stop()
-        except Exception:
-            pass
-            timers.set_user_lock("audio_update")
-        log("communication.cmd_handler", "Audio pause")
-        return {"success": True, "message": "Audio paused"}
-    
-    elif action == "stop":
-        state.actuator_state["audio"]["playing"] = False
-        state.actuator_state["audio"]["last_cmd"] = "stop"
-        try:
-            from actuators import audio as audio_module
-            audio_module.stop()
-        except Exception:
-            pass
-            timers.set_user_lock("audio_update")
-        log("communication.cmd_handler", "Audio stop")
-        return {"success": True, "message": "Audio stopped"}
-    
-    elif action == "volume":
+    playing, hw_method, response = _AUDIO_SIMPLE[action]
+    audio_state = state.actuator_state["audio"]
+    audio_state["playing"] = playing
+    audio_state["last_cmd"] = action
+    try:
+        getattr(_audio_mod, hw_method)()
+    except Exception:
+        pass
+    # Hold off auto audio logic whether or not the driver call succeeded
+    timers.set_user_lock("audio_update")
+    log("communication.cmd_handler", "Audio " + action)
+    return response
+
+
+def _audio_volume(args):
+    """audio volume <level>"""
+    try:
         volume = int(args[1])
-        state.actuator_state["audio"]["last_cmd"] = "volume:{}".format(volume)
-        timers.set_user_lock("audio_update")
-        log("communication.cmd_handler", "Audio volume set to {}".format(volume))
-        return {"success": True, "message": "Volume set to {}".format(volume)}
-    
-    elif action == "track":
+    except (IndexError, ValueError, TypeError):
+        return _ERR_AUDIO_VOLUME
+    if not 0 <= volume <= _AUDIO_MAX_VOLUME:
+        return _ERR_AUDIO_VOLUME_RANGE
+    volume_str = str(volume)
+    state.actuator_state["audio"]["last_cmd"] = "volume:" + volume_str
+    return _complete("audio_update", "Volume set to " + volume_str)
+
+
+def _audio_track(args):
+    """audio track <number>"""
+    try:
         track = int(args[1])
-        state.actuator_state["audio"]["last_cmd"] = "track:{}".format(track)
-        timers.set_user_lock("audio_update")
-        log("communication.cmd_handler", "Audio track set to {}".format(track))
-        return {"success": True, "message": "Track set to {}".format(track)}
-    
-    else:
-        return {"success": False, "message": "Invalid audio action. Use: play, pause, stop, volume, track"}
+    except (IndexError, ValueError, TypeError):
+        return _ERR_AUDIO_TRACK
+    if not 1 <= track <= _AUDIO_MAX_TRACK:
+        return _ERR_AUDIO_TRACK_RANGE
+    track_str = str(track)
+    state.actuator_state["audio"]["last_cmd"] = "track:" + track_str
+    return _complete("audio_update", "Track set to " + track_str)
+
+
+# Audio action -> sub-handler (one lookup instead of an elif chain)
+_AUDIO_DISPATCH = {
+    "play": _audio_simple,
+    "pause": _audio_simple,
+    "stop": _audio_simple,
+    "volume": _audio_volume,
+    "track": _audio_track,
+}
 
 
 def _handle_state(args):
     """Handle state command: Get current actuator state"""
+    # Snapshot one level deep so a caller encoding the reply later never
+    # sees a half-updated sub-dict from the actuator loop
+    snapshot = {
+        key: (dict(value) if isinstance(value, dict) else value)
+        for key, value in state.actuator_state.items()
+    }
     response = {
         "success": True,
         "message": "Current actuator state",
-        "state": state.actuator_state
+        "state": snapshot
     }
     log("communication.cmd_handler", "State query")
     return response
 
 
+# Status reply reused across polls: the layout never changes, so
+# _handle_status() only refreshes the values in place
+_status_info = {
+    "firmware_version": FIRMWARE_VERSION,
+    "wifi": "disconnected",
+    "simulation_mode": False,
+    "leds": state.actuator_state["led_modes"],
+    "servo_angle": 0,
+    "buzzer": "off",
+    "audio": "stopped",
+}
+_STATUS_RESPONSE = {"success": True, "message": "System status", "status": _status_info}
+
+
 def _handle_status(args):
     """Handle status command: Get system status"""
-    from communication import wifi
-    from config.config import FIRMWARE_VERSION
-    
-    status_info = {
-        "firmware_version": FIRMWARE_VERSION,
-        "wifi": "connected" if wifi.is_connected() else "disconnected",
-        "simulation_mode": state.actuator_state.get("simulation_mode", False),
-        "leds": state.actuator_state["led_modes"],
-        "servo_angle": state.actuator_state["servo"]["angle"],
-        "buzzer": "on" if state.actuator_state["buzzer"]["active"] else "off",
-        "audio": "playing" if state.actuator_state["audio"]["playing"] else "stopped",
-    }
-    
-    response = {
-        "success": True,
-        "message": "System status",
-        "status": status_info
-    }
+    actuator_state = state.actuator_state
+    info = _status_info
+    info["wifi"] = "connected" if wifi.is_connected() else "disconnected"
+    info["simulation_mode"] = actuator_state.get("simulation_mode", False)
+    info["servo_angle"] = actuator_state["servo"]["angle"]
+    info["buzzer"] = "on" if actuator_state["buzzer"]["active"] else "off"
+    info["audio"] = "playing" if actuator_state["audio"]["playing"] else "stopped"
     
     log("communication.cmd_handler", "Status query")
-    return response
+    return _STATUS_RESPONSE
 
 
 def _handle_locks(args):
     """Handle locks command: Show active user locks"""
-    from core.timers import _user_actions
-    
     if not _user_actions:
         return {"success": True, "message": "No active locks"}
     
     locks_list = ", ".join(_user_actions.keys())
     response = {
         "success": True,
-        "message": "Active user locks: {}".format(locks_list),
+        "message": "Active user locks: " + locks_list,
         "locks": list(_user_actions.keys())
     }
     
-    log("communication.cmd_handler", "Locks query: {}".format(locks_list))
+    log("communication.cmd_handler", "Locks query: " + locks_list)
     return response
 
 
 def _handle_update(args):
     """Handle update command: Set OTA flag and reboot"""
-    import json
-    import machine  # type: ignore
-    
     log("communication.cmd_handler", "OTA update requested via command")
     
     try:
-        # Try to load existing config
-        try:
-            with open("config/config.json", "r") as f:
-                config_data = json.load(f)
-        except:
-            try:
-                with open("config.json", "r") as f:
-                    config_data = json.load(f)
-            except:
-                config_data = {}
+        config_data = _load_config()
         
         # Set OTA update flag
         config_data["ota_update_pending"] = True
         
-        # Write back to config.json
-        try:
-            with open("config/config.json", "w") as f:
-                json.dump(config_data, f)
-        except:
-            with open("config.json", "w") as f:
-                json.dump(config_data, f)
+        _save_config(config_data)
         
         log("communication.cmd_handler", "=== OTA UPDATE COMMAND RECEIVED ===")
         log("communication.cmd_handler", "OTA flag set - rebooting in 1 second")
         
         # Reboot to trigger OTA update on startup
-        import time  # type: ignore
         time.sleep(1)
         log("communication.cmd_handler", "Rebooting now for OTA...")
         machine.reset()
@@ -392,10 +488,10 @@ def _handle_update(args):
             "message": "OTA update will start after reboot."
         }
     except Exception as e:
-        log("communication.cmd_handler", "Error setting OTA flag: {}".format(e))
+        log("communication.cmd_handler", "Error setting OTA flag: {}", e)
         return {
             "success": False,
-            "message": "Error setting OTA flag: {}".format(e)
+            "message": "Error setting OTA flag: " + str(e)
         }
 
 
@@ -404,61 +500,43 @@ def _handle_reboot(args):
     state.system_control["reboot_requested"] = True
     log("communication.cmd_handler", "=== REBOOT COMMAND RECEIVED ===")
     log("communication.cmd_handler", "System will reboot on next main loop iteration")
-    return {
-        "success": True,
-        "message": "System will reboot shortly."
-    }
+    return _RESP_REBOOT
 
 
 def _handle_mode(args):
     """Handle mode command: mode <real|sim>"""
-    import json
-    
     if len(args) < 1:
-        return {"success": False, "message": "Usage: mode <real|sim>"}
+        return _ERR_MODE_USAGE
     
-    mode = args[0].lower()
-    
-    if mode not in ["real", "sim", "simulation"]:
-        return {"success": False, "message": "Invalid mode. Use: real, sim"}
+    mode = args[0]
+    if mode not in _MODE_VALUES:
+        mode = mode.lower()
+        if mode not in _MODE_VALUES:
+            return _ERR_MODE_INVALID
     
-    simulate = (mode in ["sim", "simulation"])
+    simulate = (mode in _SIM_MODES)
     
     # Save mode to config.json
     try:
-        # Try to load existing config
-        try:
-            with open("config/config.json", "r") as f:
-                config_data = json.load(f)
-        except:
-            try:
-                with open("config.json", "r") as f:
-                    config_data = json.load(f)
-            except:
-                config_data = {}
+        config_data = _load_config()
         
         # Update simulate_actuators field
         config_data["simulate_actuators"] = simulate
         
-        # Write back to config.json
-        try:
-            with open("config/config.json", "w") as f:
-                json.dump(config_data, f)
-        except:
-            with open("config.json", "w") as f:
-                json.dump(config_data, f)
+        _save_config(config_data)
         
-        log("communication.cmd_handler", "Mode changed to: {}".format("simulation" if simulate else "real"))
+        mode_name = "simulation" if simulate else "real"
+        log("communication.cmd_handler", "Mode changed to: " + mode_name)
         
         # Request reboot
         state.system_control["reboot_requested"] = True
         
         return {
             "success": True,
-            "message": "Mode set to {}. System will reboot.".format("simulation" if simulate else "real")
+            "message": "Mode set to " + mode_name + ". System will reboot."
         }
     except Exception as e:
-        return {"success": False, "message": "Error saving mode: {}".format(e)}
+        return {"success": False, "message": "Error saving mode: " + str(e)}
 
 
 def _handle_log(args):
@@ -470,7 +548,7 @@ def _handle_log(args):
       log status
     """
     if not args:
-        return {"success": False, "message": "Usage: log <channel|all|status> <on|off>"}
+        return _ERR_LOG_USAGE
 
     target = args[0].lower()
 
@@ -479,23 +557,43 @@ def _handle_log(args):
         return {"success": True, "message": "Log flags status", "log_flags": get_log_flags()}
 
     if len(args) < 2:
-        return {"success": False, "message": "Usage: log <channel|all> <on|off>"}
+        return _ERR_LOG_SET_USAGE
 
-    state_arg = args[1].lower()
-    if state_arg in ("on", "true", "1"):
+    state_arg = args[1]
+    if state_arg not in _LOG_ON_VALUES and state_arg not in _LOG_OFF_VALUES:
+        state_arg = state_arg.lower()
+    if state_arg in _LOG_ON_VALUES:
         enabled = True
-    elif state_arg in ("off", "false", "0"):
+    elif state_arg in _LOG_OFF_VALUES:
         enabled = False
     else:
-        return {"success": False, "message": "Second arg must be on/off"}
+        return _ERR_LOG_VALUE
 
-    if target in ("all", "*"):
+    if target in _LOG_ALL_TARGETS:
         set_all_logs(enabled)
-        return {"success": True, "message": "All logs set to {}".format(enabled), "log_flags": get_log_flags()}
+        return {"success": True, "message": "All logs set to " + str(enabled), "log_flags": get_log_flags()}
 
     set_log_enabled(target, enabled)
     return {
         "success": True,
-        "message": "Log '{}' set to {}".format(target, enabled),
+        "message": "Log '" + target + "' set to " + str(enabled),
         "log_flags": get_log_flags(),
     }
+
+
+# Command name -> handler. Built after all handlers are defined;
+# handle_command() looks commands up here (names are lowercase).
+COMMAND_TABLE = {
+    "led": _handle_led,        # LED control: led <color> <state>
+    "servo": _handle_servo,    # Servo control: servo <angle>
+    "lcd": _handle_lcd,        # LCD control: lcd <line> <text...>
+    "buzzer": _handle_buzzer,  # Buzzer control: buzzer <state>
+    "audio": _handle_audio,    # Audio control: audio <action> [params]
+    "state": _handle_state,    # Get current state: state
+    "status": _handle_status,  # Get system status: status
+    "locks": _handle_locks,    # Show active user locks: locks
+    "update": _handle_update,  # Trigger OTA update: update
+    "reboot": _handle_reboot,  # Trigger system reboot: reboot
+    "mode": _handle_mode,      # Change simulation mode: mode <real|sim>
+    "log": _handle_log,        # Logging control: log <channel|all|status> <on|off>
+}
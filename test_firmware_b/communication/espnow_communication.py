@@ -1,7 +1,8 @@
 """ESP-NOW communication module for ESP32-B (Actuator Board - Server).
 
 Imported by: main.py
-Imports: espnow, network, time, ujson, debug.debug, core.state, core.timers, config.config
+Imports: espnow, gc, micropython, network, time, collections, ujson, debug.debug, core.state, config.config,
+         core.actuator_loop, communication.command_handler
 
 Board B acts as ESP-NOW server:
 - Waits for incoming connections from Board A (client)
@@ -28,24 +29,51 @@ Packet ID tracking prevents duplicate processing if Board A reboots.
 """
 
 import espnow  # type: ignore
+import gc
+import micropython  # type: ignore
+from micropython import const  # type: ignore
 import network  # type: ignore
 from time import ticks_ms, ticks_diff  # type: ignore
-from debug.debug import log
+from collections import deque
+from debug.debug import log, is_log_enabled
 from core import state
-from core.timers import elapsed
 from config import config
+from core import actuator_loop
+from communication import command_handler
 try:
     import ujson as json  # type: ignore  # MicroPython
 except ImportError:
     import json  # Fallback
 
+# ESP-NOW frame limit and JSON frame delimiter (inlined by const())
+_MAX_PKT = const(250)
+_LBRACE = const(0x7B)  # '{'
+_LCD_COLS = const(16)  # LCD text sent to A is capped at the display width
+
+# Firmware version, read from config once. It is a float, so it cannot be
+# a const(); a module global still saves the config attribute lookup.
+_FW_VER = config.FIRMWARE_VERSION
+
 # MAC addresses
 MAC_B = bytes.fromhex("d8bc38e470bc")  # Self (B)
 MAC_A = bytes.fromhex("5C013B4C2C34")  # Remote (A)
+_OWN_TARGETS = ("B", "b")  # Accepted command "target" values, no per-frame upper()
+
+# Byte -> two-digit uppercase hex, for MAC strings without per-byte format()
+_HEX = tuple("{:02X}".format(i) for i in range(256))
+
+
+def _mac_str(mac):
+    """Format a 6-byte MAC as AA:BB:CC:DD:EE:FF."""
+    return ":".join((_HEX[mac[0]], _HEX[mac[1]], _HEX[mac[2]],
+                     _HEX[mac[3]], _HEX[mac[4]], _HEX[mac[5]]))
+
+
+_MAC_A_STR = _mac_str(MAC_A)  # Peer MAC never changes: format it once
 
 # Connection tracking and message IDs
-CONNECTION_TIMEOUT = 10000  # Consider A disconnected if no message for 10 seconds (4x send interval)
-REINIT_INTERVAL = 5000      # Try to recover ESP-NOW every 5 seconds when down
+CONNECTION_TIMEOUT = const(10000)  # Consider A disconnected if no message for 10 seconds (4x send interval)
+REINIT_INTERVAL = const(5000)      # Try to recover ESP-NOW every 5 seconds when down
 _last_message_from_a = 0
 _a_is_connected = False
 _messages_received = 0
@@ -53,16 +81,79 @@ _messages_received = 0
 # Message ID tracking (prevent loops)
 _next_msg_id = 1
 _last_received_msg_id = 0
-_pending_events = []  # Queue for immediate events (e.g., SOS activation)
+_last_received_type = "data"  # Type of the last accepted frame from A
+# Newest data msg_id from A not yet ACKed; data ACKs only serve as A's
+# heartbeat, so one per drain batch is enough (events are ACKed one by one)
+_deferred_ack_id = 0
+
+# Receive path allocates (json.loads dict trees, bytes copies): collect at a
+# fixed point every N frames instead of letting an allocation mid-parse or
+# mid-send trigger the pause
+_GC_EVERY_PACKETS = const(64)
+_packets_since_gc = 0
+# Queue for immediate events (e.g., SOS activation). Bounded: if A is away
+# and events pile up, the oldest are dropped; popleft() is O(1).
+_MAX_PENDING_EVENTS = const(16)
+_pending_events = deque((), _MAX_PENDING_EVENTS)
 
 # Event retry tracking (max 1 retry for critical events like SOS)
-EVENT_RETRY_TIMEOUT = 3000  # Retry after 3 seconds if no ACK
-_pending_event_acks = {}  # {msg_id: {"msg": data, "sent_at": timestamp, "retry_count": 0}}
+EVENT_RETRY_TIMEOUT = const(3000)  # Retry after 3 seconds if no ACK
+_pending_event_acks = {}  # {msg_id: (msg_bytes, sent_at, retry_count)}
 
 _esp_now = None
 _initialized = False
 _wifi = None
 _last_init_attempt = 0
+_warned_remote_version = None  # Last mismatching remote version warned about
+
+# Outgoing frame buffer, always 250 bytes (null padded); _tx_len is the
+# length of the message currently in it
+_TX_BUF = bytearray(_MAX_PKT)
+_tx_len = 0
+
+# Actuator status message layout; only the mutable fields are placeholders.
+# Version is %s because FIRMWARE_VERSION is a float; the last slot is the
+# optional ',"r":<id>' reply tail.
+_STATUS_TEMPLATE = (
+    '{"v":%s,"t":"%s","id":%d,"ts":%d,'
+    '"L":{"g":"%s","b":"%s","r":"%s"},'
+    '"S":{"a":%s},'
+    '"D":{"1":"%s","2":"%s"},'
+    '"B":"%s","A":"%s","O":%s%s}'
+)
+
+# Shared read-only default for missing sub-objects in received frames
+# (a literal {} default would allocate a new dict on every lookup)
+_EMPTY = {}
+
+# Minimal header-only frame used if the status template cannot be filled.
+# %s for every value so a field of unexpected type cannot fail it again.
+_FALLBACK_TEMPLATE = '{"v":%s,"t":"%s","id":%s,"ts":%s}'
+
+# ACK layout: header fields plus the id being acknowledged
+_ACK_TEMPLATE = '{"v":%s,"t":"ack","id":%d,"ts":%d,"r":%d}'
+
+# Raw LCD text -> sanitized text. The two LCD lines change far less often
+# than status frames are sent, so most calls are a dict hit.
+_lcd_text_cache = {}
+
+
+def _sanitize_lcd_text(text, max_len=_LCD_COLS):
+    """Clean LCD text for safe JSON serialization (memoized)."""
+    if not text:
+        return ""
+    clean = _lcd_text_cache.get(text)
+    if clean is not None:
+        return clean
+    clean = str(text)[:max_len]
+    # Keep printable ASCII only, minus the two characters that would need
+    # escaping inside a JSON string, so the status template is always valid
+    clean = "".join(c for c in clean if 32 <= ord(c) < 127 and c not in '"\\')
+    # Keep only a handful of entries (two lines, plus recent history)
+    if len(_lcd_text_cache) >= 4:
+        _lcd_text_cache.clear()
+    _lcd_text_cache[text] = clean
+    return clean
 
 
 def _get_actuator_status_string(msg_type="data", msg_id=None, reply_to_id=None):
@@ -72,94 +163,86 @@ def _get_actuator_status_string(msg_type="data", msg_id=None, reply_to_id=None):
         msg_type: Type of message - 'data' (periodic), 'event' (immediate), 'ack' (confirmation)
         msg_id: Message ID (auto-generated if None)
         reply_to_id: ID of message this is replying to (for ACKs)
+    
+    Returns the shared 250-byte _TX_BUF, overwritten by the next call:
+    send it right away or copy it with bytes() to keep it.
     """
     global _next_msg_id
     if msg_id is None:
         msg_id = _next_msg_id
         _next_msg_id += 1
     
-    modes = state.actuator_state["led_modes"]
-    
-    # Sanitize LCD strings to prevent JSON corruption
-    def sanitize_lcd_text(text, max_len=16):
-        """Clean LCD text for safe JSON serialization."""
-        if not text:
-            return ""
-        text = str(text)
-        text = text[:max_len]
-        # Remove potentially problematic characters for JSON
-        text = "".join(c for c in text if ord(c) >= 32 and ord(c) < 127 or c in '\n\t')
-        return text
+    actuator_state = state.actuator_state
+    modes = actuator_state["led_modes"]
+    lcd = actuator_state["lcd"]
     
     # Get actuator values
     led_green = modes.get("green", "off")
     led_blue = modes.get("blue", "off")
     led_red = modes.get("red", "off")
-    servo_angle = state.actuator_state["servo"].get("angle")
-    lcd_line1 = sanitize_lcd_text(state.actuator_state["lcd"].get("line1", ""))
-    lcd_line2 = sanitize_lcd_text(state.actuator_state["lcd"].get("line2", ""))
-    buzzer_active = state.actuator_state["buzzer"].get("active", False)
-    audio_playing = state.actuator_state["audio"].get("playing", False)
-    sos_mode = state.actuator_state.get("sos_mode", False)
-    
-    # Manual JSON construction to guarantee field order (MicroPython ujson compatibility)
-    # Using list + join() for efficiency (string concatenation in loop is very slow in MicroPython)
-    
-    parts = [
-        "{\"v\":", str(config.FIRMWARE_VERSION), ",",
-        "\"t\":\"", msg_type, "\",",
-        "\"id\":", str(msg_id), ",",
-        "\"ts\":", str(ticks_ms()), ",",
-        "\"L\":{",
-        "\"g\":\"", led_green, "\",",
-        "\"b\":\"", led_blue, "\",",
-        "\"r\":\"", led_red, "\"",
-        "},",
-        "\"S\":{",
-        "\"a\":", ("null" if servo_angle is None else str(servo_angle)),
-        "},",
-        "\"D\":{",
-        "\"1\":\"", lcd_line1, "\",",
-        "\"2\":\"", lcd_line2, "\"",
-        "},",
-        "\"B\":\"", ("ON" if buzzer_active else "OFF"), "\",",
-        "\"A\":\"", ("PLAY" if audio_playing else "STOP"), "\",",
-        "\"O\":", ("true" if sos_mode else "false"),
-    ]
-    
-    if reply_to_id is not None:
-        parts.append(",\"r\":")
-        parts.append(str(reply_to_id))
-    
-    parts.append("}")
-    json_str = "".join(parts)
-    msg_bytes = json_str.encode("utf-8")
-    
-    # CRITICAL FIX: Pad to 250 bytes with null terminators
-    # ESP-NOW may add garbage padding, but we control it here
-    # This ensures Board A can safely strip null bytes without losing data
-    if len(msg_bytes) < 250:
-        msg_bytes = msg_bytes + b'\x00' * (250 - len(msg_bytes))
-    
-    # Check ESP-NOW size limit (250 bytes max)
-    if len(msg_bytes) > 250:
-        log("communication.espnow", "WARNING: Message too large ({} bytes, max 250). May be truncated!".format(len(msg_bytes)))
-    
-    # Validate JSON is correct and parseable
+    servo_angle = actuator_state["servo"].get("angle")
+    lcd_line1 = _sanitize_lcd_text(lcd.get("line1", ""))
+    lcd_line2 = _sanitize_lcd_text(lcd.get("line2", ""))
+    buzzer_active = actuator_state["buzzer"].get("active", False)
+    audio_playing = actuator_state["audio"].get("playing", False)
+    sos_mode = actuator_state.get("sos_mode", False)
+    
+    # Manual JSON construction to guarantee field order (MicroPython ujson compatibility).
+    # One %-format over a fixed template: a single allocation instead of a
+    # 30-item parts list plus join. Every placeholder is a number, a fixed
+    # keyword or sanitized text, so the result is valid JSON by construction
+    # and needs no json.loads() check afterwards.
     try:
-        json.loads(json_str)  # Verify JSON is valid
-    except ValueError as e:
-        log("communication.espnow", "WARNING: Generated JSON is invalid: {}".format(e))
-        log("communication.espnow", "JSON: {}".format(json_str[:100]))
-        return msg_bytes
-    except Exception as e:
+        json_str = _STATUS_TEMPLATE % (
+            _FW_VER, msg_type, msg_id, ticks_ms(),
+            led_green, led_blue, led_red,
+            "null" if servo_angle is None else servo_angle,
+            lcd_line1, lcd_line2,
+            "ON" if buzzer_active else "OFF",
+            "PLAY" if audio_playing else "STOP",
+            "true" if sos_mode else "false",
+            "" if reply_to_id is None else ',"r":%d' % reply_to_id,
+        )
+    except TypeError as e:
+        # A field of an unexpected type (e.g. non-int id): send minimal valid JSON
         log("communication.espnow", "ERROR serializing to JSON: {}".format(e))
-        # Fallback: send minimal valid JSON
-        fallback = json.dumps({"v": config.FIRMWARE_VERSION, "t": msg_type, "id": msg_id, "ts": ticks_ms()}).encode("utf-8")
         log("communication.espnow", "Using fallback message")
-        return fallback
+        return _pad_frame((_FALLBACK_TEMPLATE % (_FW_VER, msg_type, msg_id, ticks_ms())).encode("utf-8"))
+    return _pad_frame(json_str.encode("utf-8"))
+
+
+def _make_ack(reply_to_id):
+    """Build a short ACK frame for Board A's msg reply_to_id.
     
-    return msg_bytes
+    Board A reads only the id/reply fields of an ACK, so no actuator state
+    is serialized. Returns the shared _TX_BUF (see _pad_frame).
+    """
+    global _next_msg_id
+    msg_id = _next_msg_id
+    _next_msg_id += 1
+    return _pad_frame((_ACK_TEMPLATE % (_FW_VER, msg_id, ticks_ms(), reply_to_id)).encode("utf-8"))
+
+
+def _pad_frame(msg_bytes):
+    """Copy an encoded message into _TX_BUF, null padded to 250 bytes."""
+    # Check ESP-NOW size limit (250 bytes max)
+    msg_len = len(msg_bytes)
+    if msg_len > _MAX_PKT:
+        log("communication.espnow", "WARNING: Message too large ({} bytes, max 250). May be truncated!".format(msg_len))
+        return msg_bytes
+    
+    # CRITICAL FIX: Pad to 250 bytes with null terminators
+    # ESP-NOW may add garbage padding, but we control it here
+    # This ensures Board A can safely strip null bytes without losing data.
+    # The padded frame lives in the shared _TX_BUF: bytes past the previous
+    # message are already zero, so only the stale tail needs clearing.
+    global _tx_len
+    _TX_BUF[:msg_len] = msg_bytes
+    if _tx_len > msg_len:
+        _TX_BUF[msg_len:_tx_len] = bytes(_tx_len - msg_len)
+    _tx_len = msg_len
+    
+    return _TX_BUF
 
 
 def init_espnow_comm():
@@ -211,14 +294,9 @@ def init_espnow_comm():
             actual_mac = _wifi.config('mac')
         except (AttributeError, OSError):
             actual_mac = MAC_B  # Fallback to configured MAC
-        mac_str = ":".join("{:02X}".format(b) for b in actual_mac)
         
-        log("communication.espnow", "ESP-NOW initialized (Server mode)")
-        log("communication.espnow", "My MAC: {}".format(mac_str))
-        log("communication.espnow", "Peer added: Scheda A ({})".format(
-            ":".join("{:02X}".format(b) for b in MAC_A)
-        ))
-        log("communication.espnow", "Ready to receive messages")
+        log("communication.espnow", "ESP-NOW initialized (Server mode)\n  My MAC: {}\n  Peer added: Scheda A ({})\n  Ready to receive messages",
+            _mac_str(actual_mac), _MAC_A_STR)
         return True
     except Exception as e:
         log("communication.espnow", "Initialization failed: {}".format(e))
@@ -232,7 +310,8 @@ def send_message(data):
     """Send message to Scheda A.
     
     Args:
-        data: String or bytes to send
+        data: bytes or bytearray to send (every frame builder here returns
+            bytes already, so there is no str/encode path)
     
     Returns:
         True if sent successfully, False otherwise
@@ -243,10 +322,6 @@ def send_message(data):
         return False
     
     try:
-        if isinstance(data, str):
-            data = data.encode("utf-8")
-        
-        # Log after successful send with full context
         _esp_now.send(MAC_A, data)
         return True
     except Exception as e:
@@ -257,30 +332,28 @@ def send_message(data):
         return False
 
 
-def _check_event_retry():
-    """Check pending events and retry if no ACK received within timeout (max 1 retry)."""
-    global _pending_event_acks
+def _check_event_retry(now):
+    """Check pending events and retry if no ACK received within timeout (max 1 retry).
     
-    now = ticks_ms()
-    to_remove = []
+    now: ticks_ms() timestamp of the current update() tick
+    """
+    # Usually empty: nothing to do
+    if not _pending_event_acks:
+        return
     
-    for msg_id, event_info in _pending_event_acks.items():
-        elapsed_time = ticks_diff(now, event_info["sent_at"])
+    # Snapshot the keys so entries can be dropped in the same pass
+    for msg_id in list(_pending_event_acks):
+        msg, sent_at, retry_count = _pending_event_acks[msg_id]
         
         # If timeout and retry not exhausted, retry once
-        if elapsed_time > EVENT_RETRY_TIMEOUT:
-            if event_info["retry_count"] < 1:
+        if ticks_diff(now, sent_at) > EVENT_RETRY_TIMEOUT:
+            if retry_count < 1:
                 # Retry once
-                send_message(event_info["msg"])
-                event_info["sent_at"] = now
-                event_info["retry_count"] += 1
+                send_message(msg)
+                _pending_event_acks[msg_id] = (msg, now, retry_count + 1)
             else:
                 # Max retry reached, give up
-                to_remove.append(msg_id)
-    
-    # Clean up failed events
-    for msg_id in to_remove:
-        del _pending_event_acks[msg_id]
+                del _pending_event_acks[msg_id]
 
 
 def send_event_immediate(event_type="sos_activated", custom_data=None):
@@ -295,7 +368,6 @@ def send_event_immediate(event_type="sos_activated", custom_data=None):
     Returns:
         True if queued/sent successfully
     """
-    global _pending_events
     event_msg = {
         "event_type": event_type,
         "custom_data": custom_data or {}
@@ -316,16 +388,19 @@ def _parse_command(msg_bytes):
         False if not a command (should try parsing as sensor data)
         None if parsing failed (don't try further parsing)
     """
+    # Sensor frames (the vast majority) carry no "target" key: reject them
+    # with a C-level substring search instead of a full decode and parse
+    if b'"target"' not in msg_bytes:
+        return False
+    
     try:
-        msg_str = msg_bytes.decode("utf-8")
-        data = json.loads(msg_str)
+        # json.loads takes the bytes directly: no decoded str copy
+        data = json.loads(msg_bytes)
         
         # Check if this is a command (has target, command, args keys)
         if "target" in data and "command" in data:
-            target = data.get("target", "").upper()
-            
             # Ignore if not for us
-            if target != "B":
+            if data["target"] not in _OWN_TARGETS:
                 return None  # Parsing succeeded but not for us, don't try sensor parsing
             
             command = data.get("command", "")
@@ -339,7 +414,6 @@ def _parse_command(msg_bytes):
             
             # Execute command using command_handler
             try:
-                from communication import command_handler
                 response = command_handler.handle_command(command, args)
                 
                 if response.get("success"):
@@ -362,136 +436,175 @@ def _parse_command(msg_bytes):
 def _validate_message(msg_bytes):
     """Validate message structure before JSON parsing.
     
+    Cheap structural check only: UTF-8 and full JSON syntax are left to
+    json.loads, which has to check them anyway.
+    
     Returns:
-        True if message looks valid, False otherwise
+        End offset of the JSON (index just past the last '}') if the message
+        looks valid, so callers can trim padding with one slice; 0 otherwise
     """
-    # Check type
-    if not isinstance(msg_bytes, (bytes, bytearray)):
-        log("espnow_b", "Invalid message type: {}".format(type(msg_bytes)))
-        return False
-    
-    # Check not empty
-    if len(msg_bytes) == 0:
-        log("espnow_b", "Empty message received")
-        return False
-    
-    # Strip null bytes first
-    msg_bytes = bytes(msg_bytes).rstrip(b'\x00')
-    
-    # Check if it starts with '{' (JSON)
-    if msg_bytes[0:1] != b'{':
-        log("espnow_b", "Message doesn't start with '{{': preview={}".format(msg_bytes[:20]))
-        return False
-    
-    # Check if it ends with '}'
-    if msg_bytes[-1:] != b'}':
-        log("espnow_b", "Message doesn't end with '}}': preview={}".format(msg_bytes[-20:]))
-        return False
-    
-    # Basic UTF-8 validation
-    try:
-        msg_bytes.decode("utf-8")
-    except UnicodeDecodeError:
-        log("espnow_b", "Message is not valid UTF-8")
-        return False
-    
-    return True
+    # Check type and not empty
+    if not isinstance(msg_bytes, (bytes, bytearray)) or not msg_bytes:
+        log("espnow_b", "Invalid or empty message: {}", type(msg_bytes))
+        return 0
+    
+    # Check if it starts with '{' (JSON) - int compare, no slice allocated
+    if msg_bytes[0] != _LBRACE:
+        log("espnow_b", "Message doesn't start with '{{': preview={}", msg_bytes[:20])
+        return 0
+    
+    # Check a closing '}' exists (anything after it is null padding)
+    end = msg_bytes.rfind(b'}') + 1
+    if not end:
+        log("espnow_b", "Message has no closing '}}': preview={}", msg_bytes[-20:])
+    return end
 
 
+@micropython.native
 def _parse_sensor_state(msg_bytes):
     """Parse received sensor state from Board A (JSON format) and update state.
     
+    msg_bytes is an already validated frame with padding trimmed (see update()).
+    
     Supports both compact and full JSON formats:
     
     Compact format only (v=version, t=type, id=msg_id, etc.):
     {"v":1,"t":"data","id":1,"ts":9622,"s":{"T":25,"C":150,"U":50,"P":false,"H":{"b":75,"o":98}},"B":{"1":false,"2":false,"3":false},"A":{"L":"normal","S":null}}
+    
+    Only json.loads() is guarded here; any other error (e.g. a payload that
+    is not a JSON object) propagates to the single handler in _process_frame().
     """
+    # Try to parse JSON (json.loads takes the bytes directly, no decoded copy)
     try:
-        # Validate message structure first
-        if not _validate_message(msg_bytes):
-            return None
-        
-        # Strip trailing null bytes that ESP-NOW may add
-        msg_bytes = msg_bytes.rstrip(b'\x00')
-        
-        msg_str = msg_bytes.decode("utf-8")
-        
-        # Try to parse JSON
-        try:
-            data = json.loads(msg_str)
-        except ValueError as e:
-            log("communication.espnow", "Parse error: " + str(e))
-            log("communication.espnow", "Message length: " + str(len(msg_str)))
-            log("communication.espnow", "First 100 chars: " + msg_str[:100])
-            log("communication.espnow", "Last 50 chars: " + msg_str[-50:])
-            return None
+        data = json.loads(msg_bytes)
+    except ValueError as e:
+        # One log call (one timestamp, one print/UDP send) for the whole dump
+        log("communication.espnow", "Parse error: {}\n  Message length: {}\n  First 100 bytes: {}\n  Last 50 bytes: {}",
+            e, len(msg_bytes), msg_bytes[:100], msg_bytes[-50:])
+        return None
+    
+    # Extract message metadata (compact format only)
+    msg_id = data.get("id", 0)
+    msg_type = data.get("t", "data")
+    remote_version = data.get("v")
+    
+    log("espnow_b", "RX: msg_id={} type={}".format(msg_id, msg_type))
+    
+    # Track received message ID to prevent duplicates
+    global _last_received_msg_id, _last_received_type
+    if msg_id <= _last_received_msg_id and msg_type != "ack":
+        log("espnow_b", "Duplicate msg_id={}, ignoring".format(msg_id))
+        return None  # Return msg_id None to signal duplicate
+    if msg_type != "ack":
+        _last_received_msg_id = msg_id
+        _last_received_type = msg_type
+    
+    # If this is just an ACK, don't update state and DON'T send another ACK back
+    if msg_type == "ack":
+        reply_to = data.get("r")
+        log("espnow_b", "ACK received for msg_id={}".format(reply_to))
         
-        # Extract message metadata (compact format only)
-        msg_id = data.get("id", 0)
-        msg_type = data.get("t", "data")
-        remote_version = data.get("v")
+        # Remove from pending events if it was an event waiting for ACK
+        # (one hashed pop instead of a membership test plus del)
+        if _pending_event_acks.pop(reply_to, None) is not None:
+            log("espnow_b", "Event msg_id={} confirmed, removed from pending".format(reply_to))
         
-        log("espnow_b", "RX: msg_id={} type={}".format(msg_id, msg_type))
+        return -1  # Special code: ACK received, don't respond with another ACK
+    
+    # Check version (warning only, don't block communication).
+    # Warn once per remote version, not on every frame.
+    global _warned_remote_version
+    if remote_version != _FW_VER and remote_version != _warned_remote_version:
+        _warned_remote_version = remote_version
+        log("communication.espnow", "WARNING: Firmware version mismatch! Local=v{}, Remote=v{}",
+            _FW_VER, remote_version)
+    
+    # Parse sensors (compact format only)
+    rss = state.received_sensor_state
+    sensors = data.get("s", _EMPTY)
+    rss["temperature"] = sensors.get("T")
+    rss["co"] = sensors.get("C")
+    rss["ultrasonic_distance"] = sensors.get("U")
+    rss["presence_detected"] = sensors.get("P", False)
+    
+    # Parse heart rate (compact)
+    hr = sensors.get("H", _EMPTY)
+    rss["heart_rate_bpm"] = hr.get("b")
+    rss["heart_rate_spo2"] = hr.get("o")
+    
+    # Parse buttons (compact)
+    buttons = data.get("B", _EMPTY)
+    rss["button_b1"] = buttons.get("1", False)
+    rss["button_b2"] = buttons.get("2", False)
+    rss["button_b3"] = buttons.get("3", False)
+    
+    # Parse alarm (compact)
+    alarm = data.get("A", _EMPTY)
+    rss["alarm_level"] = alarm.get("L", "normal")
+    rss["alarm_source"] = alarm.get("S")
+    rss["alarm_sos_mode"] = alarm.get("M", False)
+    
+    rss["last_update"] = ticks_ms()
+    rss["is_stale"] = False
+    
+    return msg_id  # Return msg_id to send ACK
+
+
+def _process_frame(msg_bytes, now):
+    """Handle one validated, padding-trimmed frame from Board A.
+    
+    Commands are executed; sensor data and events update state and get an
+    ACK (events right away, data once per drain batch from update()); ACKs
+    clear pending events.
+    
+    Returns:
+        True if the frame counts as a sign of life from A (command, data or
+        event), False otherwise
+    """
+    global _messages_received, _last_message_from_a, _a_is_connected, _deferred_ack_id
+    
+    try:
+        # First, try to parse as a command (from app via A)
+        # Returns: True (command), False (not command), None (parsing failed)
+        cmd_result = _parse_command(msg_bytes)
         
-        # Track received message ID to prevent duplicates
-        global _last_received_msg_id
-        if msg_id <= _last_received_msg_id and msg_type != "ack":
-            log("espnow_b", "Duplicate msg_id={}, ignoring".format(msg_id))
-            return None  # Return msg_id None to signal duplicate
-        if msg_type != "ack":
-            _last_received_msg_id = msg_id
+        # If it was a command, update connection status
+        if cmd_result is True:
+            _last_message_from_a = now
+            if not _a_is_connected:
+                log("communication.espnow", "Board A connected")
+                _a_is_connected = True
+            return True
         
-        # If this is just an ACK, don't update state and DON'T send another ACK back
-        if msg_type == "ack":
-            reply_to = data.get("r")
-            log("espnow_b", "ACK received for msg_id={}".format(reply_to))
+        # If not a command (False), try parsing as sensor data
+        elif cmd_result is False:
+            # Parse JSON sensor data from A (returns msg_id, -1 for ACK, or None for error)
+            received_msg_id = _parse_sensor_state(msg_bytes)
             
-            # Remove from pending events if it was an event waiting for ACK
-            global _pending_event_acks
-            if reply_to in _pending_event_acks:
-                del _pending_event_acks[reply_to]
-                log("espnow_b", "Event msg_id={} confirmed, removed from pending".format(reply_to))
-            
-            return -1  # Special code: ACK received, don't respond with another ACK
-        
-        # Check version (warning only, don't block communication)
-        if remote_version != config.FIRMWARE_VERSION:
-            log("communication.espnow", "WARNING: Firmware version mismatch! Local=v{}, Remote=v{}".format(
-                config.FIRMWARE_VERSION, remote_version
-            ))
-        
-        # Parse sensors (compact format only)
-        sensors = data.get("s", {})
-        state.received_sensor_state["temperature"] = sensors.get("T")
-        state.received_sensor_state["co"] = sensors.get("C")
-        state.received_sensor_state["ultrasonic_distance"] = sensors.get("U")
-        state.received_sensor_state["presence_detected"] = sensors.get("P", False)
-        
-        # Parse heart rate (compact)
-        hr = sensors.get("H", {})
-        state.received_sensor_state["heart_rate_bpm"] = hr.get("b")
-        state.received_sensor_state["heart_rate_spo2"] = hr.get("o")
-        
-        # Parse buttons (compact)
-        buttons = data.get("B", {})
-        state.received_sensor_state["button_b1"] = buttons.get("1", False)
-        state.received_sensor_state["button_b2"] = buttons.get("2", False)
-        state.received_sensor_state["button_b3"] = buttons.get("3", False)
-        
-        # Parse alarm (compact)
-        alarm = data.get("A", {})
-        state.received_sensor_state["alarm_level"] = alarm.get("L", "normal")
-        state.received_sensor_state["alarm_source"] = alarm.get("S")
-        state.received_sensor_state["alarm_sos_mode"] = alarm.get("M", False)
-        
-        state.received_sensor_state["last_update"] = ticks_ms()
-        state.received_sensor_state["is_stale"] = False
+            # Send ACK only if we successfully parsed a data or event message
+            # Don't send ACK for ACKs (received_msg_id == -1)
+            if received_msg_id is not None and received_msg_id > 0:
+                _last_message_from_a = now
+                _messages_received += 1
+                if not _a_is_connected:
+                    log("communication.espnow", "Board A connected")
+                    _a_is_connected = True
+                
+                # Events are tracked for retry on A, so confirm each one.
+                # Data ACKs are coalesced: update() sends one for the newest
+                # msg_id after the drain loop.
+                if _last_received_type == "event":
+                    send_message(_make_ack(received_msg_id))
+                    log("espnow_b", "Sent ACK for msg_id={}", received_msg_id)
+                else:
+                    _deferred_ack_id = received_msg_id
+                return True
         
-        return msg_id  # Return msg_id to send ACK
+        # If cmd_result is None, parsing completely failed, error already logged
+                
     except Exception as e:
-        # Silent failure - handle parse errors without verbose logging
-        pass
-        return None
+        log("communication.espnow", "Message processing error: {}", e)
+    return False
 
 
 def update():
@@ -500,17 +613,21 @@ def update():
     Called periodically from main loop to receive sensor data from A
     and respond with actuator status.
     """
-    global _messages_received, _last_message_from_a, _a_is_connected
+    global _a_is_connected, _deferred_ack_id, _packets_since_gc
     
     if not _initialized or _esp_now is None:
-        # Auto-recover ESP-NOW if it went down
-        if elapsed("espnow_reinit", REINIT_INTERVAL):
+        # Auto-recover ESP-NOW if it went down. init_espnow_comm() stamps
+        # _last_init_attempt on every try, so that is the retry deadline
+        if ticks_diff(ticks_ms(), _last_init_attempt) >= REINIT_INTERVAL:
             log("communication.espnow", "ESP-NOW down, attempting re-init")
             init_espnow_comm()
         return
     
-    # Check if A is still connected (heartbeat timeout check)
+    # One timestamp per tick: connection check, receive bookkeeping and
+    # event tracking are all fine with millisecond-level staleness
     now = ticks_ms()
+    
+    # Check if A is still connected (heartbeat timeout check)
     if _last_message_from_a > 0:
         elapsed_since = ticks_diff(now, _last_message_from_a)
         if elapsed_since > CONNECTION_TIMEOUT:
@@ -523,134 +640,116 @@ def update():
                 log("communication.espnow", "Reset message ID counter for re-sync")
                 # Inform actuator loop (updates LED state)
                 try:
-                    from core import actuator_loop
                     actuator_loop.set_espnow_connected(False)
                 except Exception:
                     pass
                 # In standby mode, reset sensor state to safe defaults
-                state.received_sensor_state["alarm_level"] = "normal"
-                state.received_sensor_state["alarm_source"] = None
-                state.received_sensor_state["presence_detected"] = False
+                rss = state.received_sensor_state
+                rss["alarm_level"] = "normal"
+                rss["alarm_source"] = None
+                rss["presence_detected"] = False
         else:
             if not _a_is_connected:
                 log("communication.espnow", "Board A reconnected")
                 _a_is_connected = True
     
-    # Drain ALL pending messages from buffer to prevent overflow
-    # Process messages in order, use first valid one
+    # Drain ALL pending messages from buffer to prevent overflow.
+    # Every frame is handled in this call (capped so a burst cannot starve
+    # the rest of the main loop) instead of waiting for later ticks.
     messages_processed = 0
     max_messages_per_cycle = 10
-    valid_messages = []  # Store all valid messages
-    
-    while messages_processed < max_messages_per_cycle:
+    verbose_rx = is_log_enabled("espnow_b")
+    # Bound methods: one attribute lookup per tick instead of per frame
+    queued = _esp_now.any
+    irecv = _esp_now.irecv
+    heard_from_a = False
+    
+    # any() is a cheap queue check: an idle tick never enters irecv() or
+    # its exception path
+    while messages_processed < max_messages_per_cycle and queued():
         try:
-            mac, msg = _esp_now.irecv(0)
-            
-            if mac is None or msg is None:
-                # No more messages available
-                break
-            
-            messages_processed += 1
-            
-            try:
-                mac_str = ":".join("{:02X}".format(b) for b in mac)
-            except Exception:
-                mac_str = str(mac)
-            
-            # Convert to bytes if it's a bytearray
-            if isinstance(msg, bytearray):
-                msg = bytes(msg)
-            
-            log("espnow_b", "RX from {} len={}".format(mac_str, len(msg)))
-            
-            # Validate message before storing
-            if _validate_message(msg):
-                valid_messages.append(msg)
-            else:
-                log("espnow_b", "Message validation failed, skipping")
-            
+            mac, msg = irecv(0)
         except OSError:
             # OSError is normal when buffer is empty - silent break
             break
-    
-    # Process the FIRST valid message (most likely to be complete)
-    if valid_messages:
-        if messages_processed > 1:
-            log("espnow_b", "Drained {} messages ({} valid), using first valid".format(
-                messages_processed, len(valid_messages)))
         
-        # Use first valid message
-        msg_to_process = valid_messages[0]
+        if mac is None or msg is None:
+            # No more messages available
+            break
+        
+        messages_processed += 1
+        
+        # Per-frame RX trace: only build the MAC string when it is logged
+        if verbose_rx:
+            try:
+                mac_str = _MAC_A_STR if mac == MAC_A else _mac_str(mac)
+            except Exception:
+                mac_str = str(mac)
+            log("espnow_b", "RX from {} len={}", mac_str, len(msg))
+        
+        # irecv() hands back its reusable bytearray; MicroPython's bytearray
+        # lacks rfind/rstrip, so copy to bytes before validating
+        if isinstance(msg, bytearray):
+            msg = bytes(msg)
+        end = _validate_message(msg)
+        if not end:
+            log("espnow_b", "Message validation failed, skipping")
+            continue
         
+        # Single slice drops the null padding for both parsers; A's frames
+        # are unpadded, so the slice (and its copy) almost never runs. A
+        # memoryview would gain nothing and breaks _parse_command's
+        # bytes substring prefilter
+        if end < len(msg):
+            msg = msg[:end]
+        if _process_frame(msg, now):
+            heard_from_a = True
+    
+    if messages_processed > 1:
+        log("espnow_b", "Drained {} messages", messages_processed)
+    
+    # One data ACK per batch: a burst of N frames costs a single reply.
+    # IDs only grow (duplicates are dropped), so this is the newest one.
+    if _deferred_ack_id:
         try:
-            # First, try to parse as a command (from app via A)
-            # Returns: True (command), False (not command), None (parsing failed)
-            cmd_result = _parse_command(msg_to_process)
-            
-            # If it was a command, update connection status
-            if cmd_result is True:
-                _last_message_from_a = ticks_ms()
-                if not _a_is_connected:
-                    log("communication.espnow", "Board A connected")
-                    _a_is_connected = True
-                # Inform actuator loop (updates LED state)
-                try:
-                    from core import actuator_loop
-                    actuator_loop.set_espnow_connected(True)
-                except Exception:
-                    pass
-            
-            # If not a command (False), try parsing as sensor data
-            elif cmd_result is False:
-                # Parse JSON sensor data from A (returns msg_id, -1 for ACK, or None for error)
-                received_msg_id = _parse_sensor_state(msg_to_process)
-                
-                # Send ACK only if we successfully parsed a data or event message
-                # Don't send ACK for ACKs (received_msg_id == -1)
-                if received_msg_id is not None and received_msg_id > 0:
-                    _last_message_from_a = ticks_ms()
-                    _messages_received += 1
-                    if not _a_is_connected:
-                        log("communication.espnow", "Board A connected")
-                        _a_is_connected = True
-                    # Inform actuator loop (updates LED state)
-                    try:
-                        from core import actuator_loop
-                        actuator_loop.set_espnow_connected(True)
-                    except Exception:
-                        pass
-                    
-                    # Send ACK back to A (confirmation of receipt)
-                    ack_msg = _get_actuator_status_string(msg_type="ack", reply_to_id=received_msg_id)
-                    send_message(ack_msg)
-                    log("espnow_b", "Sent ACK for msg_id={}".format(received_msg_id))
-            
-            # If cmd_result is None, parsing completely failed, error already logged
-                    
+            send_message(_make_ack(_deferred_ack_id))
+            log("espnow_b", "Sent ACK for msg_id={}", _deferred_ack_id)
         except Exception as e:
-            log("communication.espnow", "Message processing error: {}".format(e))
+            log("communication.espnow", "ACK send error: {}", e)
+        _deferred_ack_id = 0
+    
+    # Deterministic GC point: after the batch is handled and ACKed, before
+    # the next event send
+    _packets_since_gc += messages_processed
+    if _packets_since_gc >= _GC_EVERY_PACKETS:
+        _packets_since_gc = 0
+        gc.collect()
+    
+    # Inform actuator loop (updates LED state) once per tick, however many
+    # frames from A arrived
+    if heard_from_a:
+        try:
+            actuator_loop.set_espnow_connected(True)
+        except Exception:
+            pass
     
     # Check for events that need retry (no ACK received within timeout)
-    _check_event_retry()
+    _check_event_retry(now)
     
     # Send pending events immediately (bypass timer)
     try:
-        global _pending_events, _pending_event_acks
         if _pending_events:
-            event = _pending_events.pop(0)
+            event = _pending_events.popleft()
             
             # Get message ID for tracking
             msg_id = _next_msg_id
             event_msg = _get_actuator_status_string(msg_type="event", msg_id=msg_id)
             
-            # Track this event for ACK confirmation (max 1 retry)
-            _pending_event_acks[msg_id] = {
-                "msg": event_msg,
-                "sent_at": ticks_ms(),
-                "retry_count": 0
-            }
+            # Track this event for ACK confirmation (max 1 retry).
+            # Keep a copy: event_msg is the shared TX buffer.
+            _pending_event_acks[msg_id] = (bytes(event_msg), now, 0)
             
             send_message(event_msg)
     except Exception as e:
-        log("communication.espnow", "Event send error: {}".format(e))
+        log("communication.espnow", "Event send error: {}", e)
 
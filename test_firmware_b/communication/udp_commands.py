@@ -1,7 +1,7 @@
 """UDP command listener for ESP32-B development and testing.
 
 Imported by: main.py
-Imports: socket, ujson, debug.debug, communication.command_handler
+Imports: socket, select, ujson, debug.debug, communication.command_handler
 
 Listens for incoming UDP commands on port 37022 and passes them to command_handler.
 Uses non-blocking socket to integrate seamlessly with main loop.
@@ -21,6 +21,10 @@ Protocol: JSON messages on UDP port 37022
 """
 
 import socket
+try:
+    import uselect as select  # type: ignore  # MicroPython
+except ImportError:
+    import select  # Fallback
 try:
     import ujson as json  # type: ignore  # MicroPython
 except ImportError:
@@ -30,7 +34,12 @@ from communication import command_handler
 
 # Configuration
 UDP_COMMAND_PORT = 37022  # Port to listen for commands
+_OWN_TARGETS = ("B", "b")  # Accepted "target" values, no per-packet upper()
+# Largest command frame accepted. Real commands are well under 200 bytes;
+# anything bigger is dropped before decode/json.loads allocate for it.
+_MAX_CMD_LEN = 512
 _socket = None
+_poller = None  # select.poll() with _socket registered for POLLIN
 _initialized = False
 _messages_received = 0  # Track total messages received
 _update_cycles = 0      # Track update() calls for diagnostics
@@ -38,7 +47,10 @@ _update_cycles = 0      # Track update() calls for diagnostics
 
 def init():
     """Initialize UDP command listener (non-blocking socket)."""
-    global _socket, _initialized
+    global _socket, _poller, _initialized
+    
+    # Release any socket left from a previous init so re-init can rebind
+    deinit()
     
     try:
         _socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -46,6 +58,10 @@ def init():
         _socket.bind(('', UDP_COMMAND_PORT))
         _socket.setblocking(False)  # Non-blocking for integration with main loop
         
+        # Poll for readability so idle update() calls skip recvfrom entirely
+        _poller = select.poll()
+        _poller.register(_socket, select.POLLIN)
+        
         _initialized = True
         log("communication.udp_cmd", "UDP command listener started on port {}".format(UDP_COMMAND_PORT))
         log("communication.udp_cmd", "Ready to receive commands from UDP clients")
@@ -57,6 +73,30 @@ def init():
         return False
 
 
+def deinit():
+    """Close the UDP command socket and drop it from the poller.
+    
+    Safe to call when not initialized; init() calls it before rebinding.
+    """
+    global _socket, _poller, _initialized
+    
+    _initialized = False
+    if _socket is None:
+        return
+    
+    try:
+        if _poller is not None:
+            _poller.unregister(_socket)
+    except Exception:
+        pass
+    try:
+        _socket.close()
+    except Exception:
+        pass
+    _socket = None
+    _poller = None
+
+
 def update():
     """Check for incoming commands (non-blocking).
     
@@ -68,13 +108,22 @@ def update():
     global _update_cycles, _messages_received
     _update_cycles += 1
     
+    # Zero-timeout poll: nothing pending is the common case, no recvfrom needed
+    if not _poller.poll(0):
+        return
+    
     try:
         # Try to receive data (non-blocking)
-        data, addr = _socket.recvfrom(1024)
+        # One byte over the limit is enough to tell an oversized frame apart
+        data, addr = _socket.recvfrom(_MAX_CMD_LEN + 1)
         
         if not data:
             return
         
+        if len(data) > _MAX_CMD_LEN:
+            log("communication.udp_cmd", "Dropped oversized command frame (> {} bytes)", _MAX_CMD_LEN)
+            return
+        
         # Successfully received data
         _messages_received += 1
         
@@ -89,8 +138,7 @@ def update():
                 return
             
             # Check if this command is for us (target B)
-            target = cmd_data.get("target", "").upper()
-            if target != "B":
+            if cmd_data.get("target") not in _OWN_TARGETS:
                 # Not for us, ignore silently
                 return
             
@@ -119,6 +167,8 @@ def update():
             log("communication.udp_cmd", "JSON decode error: {}".format(e))
         except Exception as e:
             log("communication.udp_cmd", "Error processing command: {}".format(e))
+            # command_handler has no catch-all; still answer the sender
+            _send_response(addr, {"success": False, "message": "Error: {}".format(e)})
     
     except OSError as e:
         # No data available (EAGAIN/EWOULDBLOCK) - this is normal for non-blocking
@@ -1,6 +1,6 @@
 """Actuator system orchestration for ESP32-B.
 
-Imported by: main.py
+Imported by: main.py, communication.espnow_communication
 Imports: core.timers, core.state, debug.debug, actuators.*, logic.emergency
 
 Non-blocking orchestrator for all actuator updates using elapsed() timers.
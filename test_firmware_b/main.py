@@ -48,10 +48,13 @@ set_log_enabled("communication.cmd_handler", True)  # Enable to track commands
 # === SIMULATION MODE (loaded from config) ===
 SIMULATE_ACTUATORS = config.SIMULATE_ACTUATORS
 
+# Boot banner separator, built once instead of per log call
+_BANNER = "=" * 50
+
 
 def main():
     """Main entry point for actuator firmware."""
-    log("main", "=" * 50)
+    log("main", _BANNER)
     log("main", "ESP32-B BOOT - Firmware v{}".format(config.FIRMWARE_VERSION))
     
     # Check reset cause
@@ -66,7 +69,7 @@ def main():
     }
     cause_str = reset_causes.get(reset_cause, "UNKNOWN ({})".format(reset_cause))
     log("main", "Reset cause: {}".format(cause_str))
-    log("main", "=" * 50)
+    log("main", _BANNER)
     
     log("main", "Starting actuator firmware (B)")
     
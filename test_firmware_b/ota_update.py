@@ -72,9 +72,11 @@ def _connect_wifi(timeout=15):
     wlan.active(True)
     wlan.connect(WIFI_SSID, WIFI_PASSWORD)
 
-    start = time()
+    # Integer ms ticks: avoids soft-float time() math in the wait loop
+    timeout_ms = timeout * 1000
+    start = ticks_ms()
     while not wlan.isconnected():
-        if time() - start > timeout:
+        if ticks_diff(ticks_ms(), start) > timeout_ms:
             log("ota", "WiFi connection failed")
             return False
         # Use non-blocking wait with local elapsed helper
@@ -88,9 +90,10 @@ def _connect_wifi(timeout=15):
 
 def _check_button_pressed():
     btn = Pin(UPDATE_BUTTON_PIN, Pin.IN, Pin.PULL_UP)
-    start = time()
+    hold_ms = UPDATE_HOLD_TIME * 1000
+    start = ticks_ms()
 
-    while time() - start < UPDATE_HOLD_TIME:
+    while ticks_diff(ticks_ms(), start) < hold_ms:
         if btn.value() == 0:  # released
             return False
         # Use non-blocking wait with local elapsed helper